@@ -6,9 +6,9 @@ A SublimeText 3 plugin for reviewing todo (and other) comments within your code.
 @contributor gemisigo
 '''
 
+import bisect
+import collections
 import datetime
-import fnmatch
-import io
 import itertools
 import os
 import re
@@ -19,22 +19,55 @@ import sys
 import threading
 import timeit
 import inspect
+import uuid
 
 from string import Template
 from TodoReview.BuildVersionDoc import BuildVersionDoc
 from TodoReview.helpers import run_cli
+from TodoReview.cache import signature
+from TodoReview.engine import Engine
+from TodoReview.results import Review, rebase
+from TodoReview.watch import Index
 
 DEBUG_LEVEL = 30
 
+# every scan gets the next number, only the latest one may render
+GENERATIONS = itertools.count(1)
+thread = None
+# background indexes of the watch setting, by window id
+indexes = {}
+# seconds between two progress messages in the status bar
+REPORT_INTERVAL = 0.1
+# results waiting for todo_review_render, by scan id: run_command only carries the id,
+# so they are never serialized
+registry = {}
+SCAN_IDS = itertools.count(1)
+# what the rows of each results view are, by view id; the view's settings only
+# name the saved copy it is read back from after a restart
+reviews = {}
+
+HEADER_FORMAT = '%d - %c files (%b) in %t secs (pruned %p folders, %e files; skipped %s; cache %h hits, %m misses)'
+
 SETTINGS = [
+	"cache",
 	"case_sensitive",
 	"encoding",
+	"encoding_fallbacks",
+	"encoding_overrides",
 	"external_editor",
+	"exclude_extensions",
 	"exclude_files",
 	"exclude_folders",
+	"file_source",
+	"ignore_files",
+	"include_extensions",
 	"include_paths",
+	"match_mode",
+	"max_depth",
+	"max_file_size",
 	"merge_global_toss_target_paths",
 	"merge_global_versions",
+	"mmap_min_size",
 	"navigation_backward_skip",
 	"navigation_forward_skip",
 	"patterns",
@@ -44,8 +77,14 @@ SETTINGS = [
 	"render_header_format",
 	"render_include_folder",
 	"render_maxspaces",
+	"render_page_size",
+	"render_stream_batch",
+	"render_stream_interval",
 	"resolve_symlinks",
+	"scan_mode",
+	"scan_workers",
 	"toss_target_paths",
+	"update_on_save",
 	"version_build_step",
 	"version_build_zero",
 	"version_confirm",
@@ -64,6 +103,9 @@ SETTINGS = [
 	"version_prefix",
 	"version_suffix",
 	"version_write_back",
+	"watch",
+	"watch_cpu_budget",
+	"watch_interval",
 ]
 
 
@@ -100,103 +142,115 @@ def printd(self, text: str, debug_level: int = 20, end: str = "\n"):
 		dname = f"{self.__class__.__name__}.{caller} [{debug_level}]"
 		print(f"{dname}: {text}", end = end)
 
-class Engine():
+def format_size(size):
+	for unit in ('bytes', 'KB', 'MB', 'GB'):
+		if size < 1024 or unit == 'GB':
+			break
+		size /= 1024
+	return '{0} {1}'.format(size, unit) if unit == 'bytes' else '{0:.1f} {1}'.format(size, unit)
+
+
+def register(files, items, settings):
+	"""The scan id todo_review_render takes items, of files, from, rendering them with settings"""
+	scan = next(SCAN_IDS)
+	registry[scan] = (files, items, settings)
+	return scan
+
+
+def deliver(view, args):
+	"""Run todo_review_render with args on view; if the view was closed meanwhile nothing
+	would take the scan's results, so they are dropped"""
+	if not view.is_valid():
+		registry.pop(args['scan'], None)
+		return
+	view.run_command('todo_review_render', args)
+
+
+def cache_folder():
+	return os.path.join(sublime.cache_path(), 'TodoReview')
+
+
+def review_path(name):
+	return os.path.join(cache_folder(), 'reviews', name)
+
+
+def stored(view):
+	"""The Review of a results view, None if it has none"""
+	review = reviews.get(view.id())
+	if review is None:
+		name = view.settings().get('review_store')
+		if not name:
+			return None
+		try:
+			review = reviews[view.id()] = Review.load(review_path(name))
+		except(OSError, ValueError) as e:
+			print(f'TodoReview: could not read the saved results ({e})')
+			return None
+	return review
+
+
+def store(view, review):
+	"""Make review what the rows of view are, saving a copy off the main thread"""
+	reviews[view.id()] = review
+	name = view.settings().get('review_store')
+	if not name:
+		name = uuid.uuid4().hex + '.json'
+		view.settings().set('review_store', name)
+	# earlier versions kept every result here, in the session file
+	view.settings().erase('review_results')
+	path = review_path(name)
+
+	def save():
+		try:
+			review.save(path)
+		except OSError as e:
+			print(f'TodoReview: could not save the results ({e})')
+	sublime.set_timeout_async(save, 0)
+
+
+def forget(view):
+	reviews.pop(view.id(), None)
+	name = view.settings().get('review_store')
+	if not name:
+		return
+	view.settings().erase('review_store')
+	path = review_path(name)
+
+	def remove():
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+	sublime.set_timeout_async(remove, 0)
+
+
+def snapshot(views):
+	"""Open files' text by file name, one substr call per view, taken on the main thread
+	so the scan never calls the API again"""
+	buffers = {}
+	for view in views:
+		name = view.file_name()
+		if name and name not in buffers:
+			buffers[name] = view.substr(sublime.Region(0, view.size()))
+	return buffers
 
-	def __init__(self, dirpaths, filepaths, view):
-		self.view = view
-		self.dirpaths = dirpaths
-		self.filepaths = filepaths
-		if settings.get('case_sensitive', False):
-			case = 0
-		else:
-			case = re.IGNORECASE
-		patt_patterns = settings.get('patterns', {})
-		patt_files = settings.get('exclude_files', [])
-		patt_folders = settings.get('exclude_folders', [])
-		match_patterns = '|'.join(patt_patterns.values())
-		match_files = [fnmatch.translate(p) for p in patt_files]
-		match_folders = [fnmatch.translate(p) for p in patt_folders]
-
-		self.patterns = re.compile(match_patterns, case)
-		self.priority = re.compile(r'\(([0-9]{1,5})\)')
-		self.exclude_files = [re.compile(p) for p in match_files]
-		self.exclude_folders = [re.compile(p) for p in match_folders]
-		self.open = self.view.window().views()
-		self.open_files = [v.file_name() for v in self.open if v.file_name()]
-
-	def files(self):
-		seen_paths = []
-		for dirpath in self.dirpaths:
-			dirpath = self.resolve(dirpath)
-			for dirp, dirnames, filepaths in os.walk(dirpath, followlinks=True):
-				if any(p.search(dirp) for p in self.exclude_folders):
-					continue
-				for filepath in filepaths:
-					self.filepaths.append(os.path.join(dirp, filepath))
-		for filepath in self.filepaths:
-			p = self.resolve(filepath)
-			if p in seen_paths:
-				continue
-			if any(p.search(filepath) for p in self.exclude_folders):
-				continue
-			if any(p.search(filepath) for p in self.exclude_files):
-				continue
-			seen_paths.append(p)
-			yield p
-
-	def extract(self, files):
-		encoding = settings.get('encoding', 'utf-8')
-		for p in files:
-			try:
-				if p in self.open_files:
-					for view in self.open:
-						if view.file_name() == p:
-							f = []
-							lines = view.lines(sublime.Region(0, view.size()))
-							for line in lines:
-								f.append(view.substr(line))
-							break
-				else:
-					f = io.open(p, 'r', encoding=encoding)
-				for num, line in enumerate(f, 1):
-					for result in self.patterns.finditer(line):
-						for patt, note in result.groupdict().items():
-							if not note and note != '':
-								continue
-							priority_match = self.priority.search(note)
-							if(priority_match):
-								priority = int(priority_match.group(1))
-							else:
-								priority = 5000
-							yield {
-								'file': p,
-								'patt': patt,
-								'note': note,
-								'line': num,
-								'priority': priority
-							}
-			except(IOError, UnicodeDecodeError):
-				f = None
-			finally:
-				thread.increment()
-				if f is not None and type(f) is not list:
-					f.close()
-
-	def process(self):
-		return self.extract(self.files())
-
-	def resolve(self, directory):
-		if settings.get('resolve_symlinks', True):
-			return os.path.realpath(os.path.expanduser(os.path.abspath(directory)))
-		else:
-			return os.path.expanduser(os.path.abspath(directory))
 
 class Thread(threading.Thread):
-	def __init__(self, engine, callback):
-		self.i = 0
+	def __init__(self, engine, callback, stream=None, stopped=None):
+		self.generation = next(GENERATIONS)
 		self.engine = engine
+		# the counter of this scan, not of whichever scan is current
+		engine.progress = self.increment
 		self.callback = callback
-		self.lock = threading.RLock()
+		self.stream = stream
+		# told when a scan that has already streamed results is cancelled
+		self.stopped = stopped
+		self.streamed = False
+		# [files, bytes] per scanning thread: only its own thread writes a tally, so
+		# counting takes no lock, and the reporter sums them up
+		self.local = threading.local()
+		self.tallies = []
+		self.reported = 0
 		threading.Thread.__init__(self)
 
 	def run(self):
@@ -207,94 +261,279 @@ class Thread(threading.Thread):
 			self.thread()
 
 	def thread(self):
-		results = list(self.engine.process())
-		self.callback(results, self.finish(), self.i)
+		settings = self.engine.settings
+		size = settings.get('render_stream_batch', 200)
+		if self.stream is None or not size:
+			results = list(self.engine.process())
+		else:
+			results = self.batched(size, settings.get('render_stream_interval', 250) / 1000)
+		if self.engine.cancelled.is_set():
+			if self.streamed and self.stopped is not None:
+				self.stopped(self.generation)
+			return
+		self.report(timeit.default_timer())
+		count, size = self.totals()
+		self.engine.stats['bytes'] = size
+		self.callback(register(self.engine.table, results, self.engine.settings), self.finish(), count, self.engine.stats, self.generation)
+
+	def batched(self, size, interval):
+		# hand results over every size results or interval seconds, whichever comes first
+		results = []
+		start = 0
+		last = self.start
+		for item in self.engine.process():
+			results.append(item)
+			if len(results) - start >= size or timeit.default_timer() - last >= interval:
+				self.stream(register(self.engine.table, results[start:], self.engine.settings), self.totals()[0], start == 0, self.generation)
+				self.streamed = True
+				start = len(results)
+				last = timeit.default_timer()
+		return results
+
+	def cancel(self):
+		self.engine.cancelled.set()
 
 	def finish(self):
 		return round(timeit.default_timer() - self.start, 2)
 
-	def increment(self):
-		with self.lock:
-			self.i += 1
-			sublime.status_message("TodoReview: {0} files scanned".format(self.i))
+	def totals(self):
+		return sum(t[0] for t in self.tallies), sum(t[1] for t in self.tallies)
+
+	def increment(self, size=0):
+		tally = getattr(self.local, 'tally', None)
+		if tally is None:
+			tally = self.local.tally = [0, 0]
+			self.tallies.append(tally)
+		tally[0] += 1
+		tally[1] += size
+		now = timeit.default_timer()
+		# the status bar is updated at most every REPORT_INTERVAL seconds, not once per file
+		if now >= self.reported + REPORT_INTERVAL:
+			self.reported = now
+			self.report(now)
+
+	def report(self, now):
+		count, size = self.totals()
+		elapsed = max(now - self.start, 1e-6)
+		rate = count / elapsed
+		message = 'TodoReview: {0} files scanned, {1:.0f} files/s, {2:.1f} MB/s'.format(
+			count, rate, size / elapsed / 1048576)
+		discovered = self.engine.stats['discovered']
+		# until every file is listed the total is still growing, an ETA from it would be too short
+		if self.engine.discovering:
+			message += ', {0} found so far'.format(discovered)
+		elif discovered > count and rate:
+			message += ', {0} found, ETA {1:.0f}s'.format(discovered, (discovered - count) / rate)
+		sublime.status_message(message)
+
+
+def targets(view, args, settings):
+	"""The folders and files a todo_review run with args and settings scans"""
+	window = view.window()
+	filepaths = []
+	paths = args.get('paths', None)
+	if args.get('current_file', False):
+		return [], [view.file_name()]
+	if not paths and (paths := settings.get('include_paths', False)):
+		# warning: gem's hacking here
+		project_path = window.extract_variables()["project_path"]
+		paths = [os.path.normpath(path) if os.path.isabs(path) else os.path.normpath(
+			os.path.join(project_path, path)) for path in paths]
+
+	if args.get('open_files', False):
+		filepaths = [v.file_name() for v in window.views() if v.file_name()]
+	if not args.get('open_files_only', False):
+		if not paths:
+			paths = window.folders()
+		else:
+			for p in paths:
+				if os.path.isfile(p):
+					filepaths.append(p)
+	else:
+		paths = []
+	return paths, filepaths
+
+
+def index_key(paths, filepaths, settings):
+	return signature(sorted(paths), sorted(filepaths), [settings.get(name) for name in SETTINGS])
+
+
+def watched(view, paths, filepaths, settings, start=True):
+	"""The window's index for a review of paths and filepaths, or None; unless start is False,
+	one is started in place of an index of something else, or of one whose watcher stopped"""
+	window = view.window()
+	key = index_key(paths, filepaths, settings)
+	index = indexes.get(window.id())
+	if index is not None and index.key == key and index.thread.is_alive():
+		return index
+	if not start:
+		return None
+	if index is not None:
+		index.stop()
+	engine = Engine(paths, filepaths, settings, threading.Event(), cache_folder=cache_folder())
+	index = indexes[window.id()] = Index(
+		key, engine, settings.get('watch_interval', 5), settings.get('watch_cpu_budget', 0.1)).start()
+	return index
+
+
+def plugin_unloaded():
+	for index in indexes.values():
+		index.stop()
+	indexes.clear()
 
 
 class TodoReviewCommand(sublime_plugin.TextCommand):
 	def run(self, edit, **args):
 		global settings, thread, project_path
 		project_path = self.view.window().extract_variables()["project_path"]
-		filepaths = []
 		self.args = args
-		window = self.view.window()
-		paths = args.get('paths', None)
 		settings = Settings(self.view, args.get('settings', False))
-		if args.get('current_file', False):
-			if self.view.file_name():
-				paths = []
-				filepaths = [self.view.file_name()]
-			else:
-				print('TodoReview: File must be saved first')
+		if args.get('current_file', False) and not self.view.file_name():
+			print('TodoReview: File must be saved first')
+			return
+		paths, filepaths = targets(self.view, args, settings)
+		if settings.get('watch', False) and not args.get('current_file', False) and not args.get('open_files', False):
+			# only a search of the project itself may start the window's index or replace it
+			project = Settings(self.view, False)
+			start = index_key(paths, filepaths, settings) == index_key(*targets(self.view, {}, project), project)
+			index = watched(self.view, paths, filepaths, settings, start)
+			if index is not None and index.ready.is_set():
+				if thread is not None:
+					# nothing the last scan still has queued may draw over this
+					thread.cancel()
+				self.render_index(index)
 				return
-		else:
-			if not paths and (paths := settings.get('include_paths', False)):
-				# warning: gem's hacking here
-				paths = [os.path.normpath(path) if os.path.isabs(path) else os.path.normpath(
-					os.path.join(project_path, path)) for path in paths]
-
-			if args.get('open_files', False):
-				filepaths = [v.file_name() for v in window.views() if v.file_name()]
-			if not args.get('open_files_only', False):
-				if not paths:
-					paths = window.folders()
-				else:
-					for p in paths:
-						if os.path.isfile(p):
-							filepaths.append(p)
-			else:
-				paths = []
-		engine = Engine(paths, filepaths, self.view)
-		thread = Thread(engine, self.render)
+		if thread is not None and thread.is_alive():
+			# the running scan is superseded, it stops at the next file and never renders
+			thread.cancel()
+		engine = Engine(paths, filepaths, settings, threading.Event(), snapshot(self.view.window().views()), cache_folder())
+		thread = Thread(engine, self.render, self.stream, self.stopped)
 		thread.start()
 
-	def render(self, results, time, count):
+	def render_index(self, index):
+		start = timeit.default_timer()
+		# unsaved changes aren't on disk, the index hasn't seen them
+		overrides = {}
+		for view in self.view.window().views():
+			if view.file_name() and view.is_dirty():
+				text = view.substr(sublime.Region(0, view.size()))
+				p = index.engine.resolve(view.file_name())
+				overrides[p] = index.engine.to_records(p, index.engine.matcher.scan_text(text))
+		results, count, stats = index.results(overrides)
 		self.view.run_command('todo_review_render', {
-			"results": results,
-			"time": time,
+			"scan": register(index.engine.table, results, settings),
+			"time": round(timeit.default_timer() - start, 2),
 			"count": count,
+			"stats": stats,
 			"args": self.args
 		})
 
+	def render(self, scan, time, count, stats, generation):
+		# through the main thread, so it lands after the batches posted before it
+		sublime.set_timeout(lambda: self.post(generation, {
+			"scan": scan,
+			"time": time,
+			"count": count,
+			"stats": stats,
+			"args": self.args
+		}), 0)
+
+	def stream(self, scan, count, first, generation):
+		sublime.set_timeout(lambda: self.post(generation, {
+			"scan": scan,
+			"time": 0,
+			"count": count,
+			"args": self.args,
+			"stream": "start" if first else "more",
+			"generation": generation
+		}), 0)
+
+	def stopped(self, generation):
+		# the stream's header would say it is still scanning
+		sublime.set_timeout(lambda: self.view.run_command('todo_review_render', {"cancelled": generation}), 0)
+
+	def post(self, generation, args):
+		if thread is None or thread.generation != generation or thread.engine.cancelled.is_set():
+			registry.pop(args['scan'], None)
+			return
+		deliver(self.view, args)
+
+
+class TodoReviewCancel(sublime_plugin.TextCommand):
+	def run(self, edit):
+		if thread is not None and thread.is_alive():
+			thread.cancel()
+			sublime.status_message('TodoReview: scan cancelled')
+
+	def is_enabled(self):
+		return thread is not None and thread.is_alive()
+
+
+# what is on screen of a results view that is being streamed into, by view id
+streams = {}
+
 
 class TodoReviewRender(sublime_plugin.TextCommand):
-	def run(self, edit, results, time, count, args):
+	def run(self, edit, scan=None, time=0, count=0, args=None, stats=None, stream=None, update=None, expand=None,
+			generation=None, cancelled=None):
+		if cancelled is not None:
+			self.edit = edit
+			self.draw_cancelled(cancelled)
+			return
+		if expand is not None:
+			# the settings the review was rendered with, its page size and row layout
+			self.settings = Settings(self.view, self.view.settings().get('review_args', {}).get('settings', False))
+			self.edit = edit
+			self.draw_expand(expand)
+			return
+		if scan not in registry:
+			# replayed, the results are gone
+			return
 		self.args = args
 		self.edit = edit
 		self.time = time
 		self.count = count
-		self.results = results
+		self.stats = stats or {}
+		self.generation = generation
+		self.files, self.results, self.settings = registry.pop(scan)
+		if stream is not None:
+			self.draw_stream(stream == 'start')
+			return
+		if update is not None:
+			self.draw_update(update)
+			return
 		self.sorted = self.sort()
 		self.rview = self.get_view()
-		self.draw_header()
-		self.draw_results()
+		streams.pop(self.rview.id(), None)
+		self.draw_results(self.draw_header())
 		self.window.focus_view(self.rview)
-		self.args['settings'] = settings.proj
+		self.args['settings'] = self.settings.proj
 		self.rview.settings().set('review_args', self.args)
 
 	def sort(self):
-		self.largest = 0
-		for item in self.results:
-			self.largest = max(len(self.draw_file(item)), self.largest)
-		self.largest = min(self.largest, settings.get('render_maxspaces', 50)) + 6
-		w = settings.get('patterns_weight', {})
-		def key(m): return (str(w.get(m['patt'].upper(), m['patt'])), m['priority'])
-		results = sorted(self.results, key=key)
-		return itertools.groupby(results, key=lambda m: m['patt'])
-
-	def get_view(self):
+		self.largest = self.width(self.results)
+		results = sorted(self.results, key=self.key)
+		return itertools.groupby(results, key=lambda m: m.patt)
+
+	def key(self, m):
+		return (self.section_key(m.patt), m.priority)
+
+	def section_key(self, patt):
+		w = self.settings.get('patterns_weight', {})
+		return str(w.get(patt.upper(), patt))
+
+	def width(self, items):
+		largest = 0
+		for item in items:
+			largest = max(len(self.draw_file(item)), largest)
+		return min(largest, self.settings.get('render_maxspaces', 50)) + 6
+
+	def get_view(self, erase=True):
 		self.window = sublime.active_window()
 		for view in self.window.views():
 			if view.settings().get('todo_results', False):
-				view.erase(self.edit, sublime.Region(0, view.size()))
+				if erase:
+					view.erase(self.edit, sublime.Region(0, view.size()))
 				return view
 		view = self.window.new_file()
 		view.set_name('TodoReview')
@@ -310,67 +549,349 @@ class TodoReviewRender(sublime_plugin.TextCommand):
 		view.settings().set('command_mode', True)
 		return view
 
+	def draw_stream(self, start):
+		"""Add a batch of results to the sections they belong to, unsorted; the final
+		render redraws everything in order"""
+		self.rview = self.get_view(erase=start)
+		if start:
+			state = streams[self.rview.id()] = {'generation': self.generation, 'header': 0, 'count': 0, 'files': 0, 'largest': 0, 'sections': []}
+			# the previous report's rows are gone, don't navigate to them
+			self.rview.erase_regions('results')
+			forget(self.rview)
+			self.window.focus_view(self.rview)
+		else:
+			state = streams.get(self.rview.id())
+			if state is None:
+				return
+		for item in self.results:
+			state['largest'] = max(len(self.draw_file(item)), state['largest'])
+		self.largest = min(state['largest'], self.settings.get('render_maxspaces', 50)) + 6
+		state['count'] += len(self.results)
+		state['files'] = self.count
+		sections = state['sections']
+		groups = collections.OrderedDict()
+		for item in self.results:
+			groups.setdefault(item.patt, []).append(item)
+		for patt, items in groups.items():
+			key = self.section_key(patt)
+			for i, section in enumerate(sections):
+				if section['patt'] == patt:
+					break
+			else:
+				i = bisect.bisect_right([section['key'] for section in sections], key)
+				section = {'key': key, 'patt': patt, 'items': 0, 'size': 0}
+				sections.insert(i, section)
+			pos = state['header'] + sum(section['size'] for section in sections[:i])
+			head = self.draw_section(patt, section['items'])
+			lines = ''.join(self.draw_line(idx, item) for idx, item in enumerate(items, section['items'] + 1))
+			section['items'] += len(items)
+			self.rview.insert(self.edit, pos + section['size'], lines)
+			new_head = self.draw_section(patt, section['items'])
+			if section['size']:
+				self.rview.replace(self.edit, sublime.Region(pos, pos + len(head)), new_head)
+			else:
+				self.rview.insert(self.edit, pos, new_head)
+			section['size'] += len(new_head) + len(lines) - (len(head) if section['size'] else 0)
+		res = '// scanning: {0} results in {1} files so far\n'.format(state['count'], self.count)
+		self.rview.replace(self.edit, sublime.Region(0, state['header']), res)
+		state['header'] = len(res)
+
+	def draw_cancelled(self, generation):
+		"""Say so in the header of the view the cancelled scan generation was streaming into,
+		unless a later scan has taken it over"""
+		for view in sublime.active_window().views():
+			state = streams.get(view.id())
+			if state is not None and state['generation'] == generation:
+				del streams[view.id()]
+				res = '// scan cancelled: {0} results in {1} files, press r to scan again\n'.format(state['count'], state['files'])
+				view.replace(self.edit, sublime.Region(0, state['header']), res)
+
+	def draw_update(self, p):
+		"""Replace the results of file p, redrawing only the sections they are in"""
+		self.rview = self.view
+		regions = self.rview.get_regions('results')
+		review = stored(self.rview)
+		if review is None or len(review.rows) != len(regions):
+			return
+		# the rescanned file's results, pointing into the view's file table
+		files = review.files
+		self.results = rebase(self.results, self.files, files)
+		self.files = files
+		file = files.intern(p)
+		stale = [item for patt, items, shown in review.sections for item in items if item.file == file]
+		if sorted(stale, key=self.key) == sorted(self.results, key=self.key):
+			return
+		# sections as [patt, items, shown, start, end, first region, regions], in the order they are drawn
+		sections = []
+		first = 0
+		for patt, items, shown in review.sections:
+			count = shown + (shown < len(items))
+			start = regions[first].a - len(self.draw_section(patt, len(items)))
+			sections.append([patt, items, shown, start, regions[first + count - 1].b, first, count])
+			first += count
+		self.largest = self.width([item for section in sections for item in section[1] if item.file != file] + self.results)
+		affected = {item.patt for item in stale + self.results}
+		if self.largest != review.largest:
+			# the alignment changed, every section is redrawn
+			affected |= {section[0] for section in sections}
+		existing = {section[0]: section for section in sections}
+		end = sections[-1][4] if sections else self.rview.size()
+		page = self.settings.get('render_page_size', 0)
+		edits = []
+		for patt in sorted(affected, key=self.section_key):
+			items = [item for item in self.results if item.patt == patt]
+			if patt in existing:
+				old, shown, start, stop = existing[patt][1:5]
+				# stable, so the new rows go after the rows already there with the same priority
+				items = sorted([item for item in old if item.file != file] + items, key=self.key)
+				# a section drawn in full stays in full, a paged one keeps its number of rows
+				shown = len(items) if shown >= len(old) else min(shown, len(items))
+			else:
+				start = next((s[3] for s in sections if self.section_key(s[0]) > self.section_key(patt)), end)
+				stop = start
+				items = sorted(items, key=self.key)
+				shown = min(page, len(items)) if page else len(items)
+			text, spans = self.draw_block(patt, items, shown) if items else ('', [])
+			edits.append([start, stop, patt, items, shown, text, spans])
+		edits.sort(key=lambda e: e[0])
+		# new sections going to the same spot are inserted last to first, to keep their order
+		for start, stop, patt, items, shown, text, spans in reversed(edits):
+			self.rview.replace(self.edit, sublime.Region(start, stop), text)
+		# work out where every row is now, rather than reading it back from the view
+		placed = []
+		drawn = []
+		delta = 0
+
+		def place(start, stop, patt, items, shown, text, spans):
+			placed.extend(sublime.Region(start + delta + a, start + delta + b) for a, b in spans)
+			if items:
+				drawn.append([patt, items, shown])
+			return delta + len(text) - (stop - start)
+		pending = collections.deque(edits)
+		for patt, items, shown, start, stop, first, count in sections:
+			while pending and pending[0][1] <= start:
+				delta = place(*pending.popleft())
+			if patt not in affected:
+				placed.extend(sublime.Region(r.a + delta, r.b + delta) for r in regions[first:first + count])
+				drawn.append([patt, items, shown])
+		while pending:
+			delta = place(*pending.popleft())
+		self.rview.add_regions('results', placed, '')
+		store(self.rview, Review(files, drawn, self.largest))
+
+	def draw_expand(self, index):
+		"""Draw the next page of the section whose '... more' line is region index"""
+		self.rview = self.view
+		regions = self.rview.get_regions('results')
+		review = stored(self.rview)
+		if review is None or len(review.rows) != len(regions) or review.rows[index] is not None:
+			return
+		self.files = review.files
+		self.largest = review.largest
+		sections = []
+		first = 0
+		for patt, items, shown in review.sections:
+			count = shown + (shown < len(items))
+			if first + count - 1 == index:
+				stop = min(shown + (self.settings.get('render_page_size', 0) or len(items)), len(items))
+				text, spans = self.draw_rows(items, shown, stop)
+				region = regions[index]
+				self.rview.replace(self.edit, region, text)
+				delta = len(text) - region.size()
+				regions = regions[:index] + [sublime.Region(region.a + a, region.a + b) for a, b in spans] + \
+					[sublime.Region(r.a + delta, r.b + delta) for r in regions[index + 1:]]
+				shown = stop
+			sections.append([patt, items, shown])
+			first += count
+		self.rview.add_regions('results', regions, '')
+		self.rview.add_regions('selection', [regions[index]], 'selected', 'dot')
+		store(self.rview, Review(self.files, sections, self.largest))
+
 	def draw_header(self):
-		forms = settings.get('render_header_format', '%d - %c files in %t secs')
-		datestr = settings.get('render_header_date', '%A %m/%d/%y at %I:%M%p')
+		forms = self.settings.get('render_header_format', HEADER_FORMAT)
+		datestr = self.settings.get('render_header_date', '%A %m/%d/%y at %I:%M%p')
 		if not forms:
-			forms = '%d - %c files in %t secs'
+			forms = HEADER_FORMAT
 		if not datestr:
 			datestr = '%A %m/%d/%y at %I:%M%p'
 		if len(forms) == 0:
-			return
+			return ''
 		date = datetime.datetime.now().strftime(datestr)
+		skipped = self.stats.get('skipped', {})
+		values = {
+			'd': date,
+			't': str(self.time),
+			'c': str(self.count),
+			'b': format_size(self.stats.get('bytes', 0)),
+			'p': str(self.stats.get('pruned_folders', 0)),
+			'e': str(self.stats.get('pruned_files', 0)),
+			's': str(sum(skipped.values())),
+			'S': ', '.join(f'{reason} {count}' for reason, count in skipped.items()),
+			'h': str(self.stats.get('cache_hits', 0)),
+			'm': str(self.stats.get('cache_misses', 0)),
+		}
 		res = '// '
-		res += forms \
-			.replace('%d', date) \
-			.replace('%t', str(self.time)) \
-			.replace('%c', str(self.count))
+		res += re.sub(r'%([a-zA-Z])', lambda m: values.get(m.group(1), m.group(0)), forms)
 		res += '\n'
-		self.rview.insert(self.edit, self.rview.size(), res)
-
-	def draw_results(self):
-		data = [x[:] for x in [[]] * 2]
+		return res
+
+	def draw_results(self, header):
+		"""The report in one insert and its rows in one add_regions, working out where
+		every row goes here instead of asking the view"""
+		page = self.settings.get('render_page_size', 0)
+		out = [header]
+		pos = len(header)
+		regions = []
+		sections = []
 		for patt, items in self.sorted:
 			items = list(items)
-			res = '\n## %t (%n)\n' \
-				.replace('%t', patt.upper()) \
-				.replace('%n', str(len(items)))
-			self.rview.insert(self.edit, self.rview.size(), res)
-			for idx, item in enumerate(items, 1):
-				line = '%i. %f' \
-					.replace('%i', str(idx)) \
-					.replace('%f', self.draw_file(item))
-				res = '%f%s%n\n' \
-					.replace('%f', line) \
-					.replace('%s', ' ' * max((self.largest - len(line)), 1)) \
-					.replace('%n', item['note'])
-				start = self.rview.size()
-				self.rview.insert(self.edit, start, res)
-				region = sublime.Region(start, self.rview.size())
-				data[0].append(region)
-				data[1].append(item)
-		self.rview.add_regions('results', data[0], '')
-		d = dict(('{0},{1}'.format(k.a, k.b), v) for k, v in zip(data[0], data[1]))
-		self.rview.settings().set('review_results', d)
+			shown = min(page, len(items)) if page else len(items)
+			text, spans = self.draw_block(patt, items, shown)
+			out.append(text)
+			regions.extend(sublime.Region(pos + a, pos + b) for a, b in spans)
+			sections.append([patt, items, shown])
+			pos += len(text)
+		self.rview.insert(self.edit, 0, ''.join(out))
+		self.rview.add_regions('results', regions, '')
+		store(self.rview, Review(self.files, sections, self.largest))
+
+	def draw_block(self, patt, items, shown):
+		"""A section: its header, its first shown rows and what stands in for the rest"""
+		head = self.draw_section(patt, len(items))
+		text, spans = self.draw_rows(items, 0, shown)
+		return head + text, [(a + len(head), b + len(head)) for a, b in spans]
+
+	def draw_rows(self, items, start, stop):
+		"""Rows start to stop of a section and, if there are more, the line standing in
+		for them, with where each of them is in the text"""
+		out = []
+		spans = []
+		pos = 0
+		for idx in range(start, stop):
+			out.append(self.draw_line(idx + 1, items[idx]))
+			spans.append((pos, pos + len(out[-1])))
+			pos += len(out[-1])
+		if stop < len(items):
+			out.append(self.draw_more(len(items) - stop))
+			spans.append((pos, pos + len(out[-1])))
+		return ''.join(out), spans
+
+	def draw_section(self, patt, count):
+		return '\n## %t (%n)\n' \
+			.replace('%t', patt.upper()) \
+			.replace('%n', str(count))
+
+	def draw_more(self, count):
+		return '... %n more (press Enter to expand)\n' \
+			.replace('%n', '{0:,}'.format(count))
+
+	def draw_line(self, idx, item):
+		line = '%i. %f' \
+			.replace('%i', str(idx)) \
+			.replace('%f', self.draw_file(item))
+		return '%f%s%n\n' \
+			.replace('%f', line) \
+			.replace('%s', ' ' * max((self.largest - len(line)), 1)) \
+			.replace('%n', item.note)
 
 	def draw_file(self, item):
-		if settings.get('render_include_folder', False):
-			depth = settings.get('render_folder_depth', 1)
+		if self.settings.get('render_include_folder', False):
+			depth = self.settings.get('render_folder_depth', 1)
 			if depth == 'auto':
-				f = item['file']
+				f = self.files[item.file]
 				for folder in sublime.active_window().folders():
 					if f.startswith(folder):
 						f = os.path.relpath(f, folder)
 						break
 				f = f.replace('\\', '/')
 			else:
-				f = os.path.dirname(item['file']).replace('\\', '/').split('/')
-				f = '/'.join(f[-depth:] + [os.path.basename(item['file'])])
+				f = os.path.dirname(self.files[item.file]).replace('\\', '/').split('/')
+				f = '/'.join(f[-depth:] + [os.path.basename(self.files[item.file])])
 		else:
-			f = os.path.basename(item['file'])
+			f = os.path.basename(self.files[item.file])
 		return '%f:%l' \
 			.replace('%f', f) \
-			.replace('%l', str(item['line']))
+			.replace('%l', str(item.line))
+
+
+class TodoReviewListener(sublime_plugin.EventListener):
+	def on_post_save_async(self, view):
+		"""Rescan a saved file and update its rows in the results view, if it was part of the review"""
+		path = view.file_name()
+		window = view.window()
+		if not path or window is None or view.settings().get('todo_results', False):
+			return
+		if thread is not None and thread.is_alive():
+			# the running scan reads the file anyway
+			return
+		rview = next((v for v in window.views() if v.settings().get('todo_results', False)), None)
+		args = rview.settings().get('review_args') if rview is not None else None
+		if args is None:
+			return
+		settings = Settings(rview, args.get('settings', False))
+		if not settings.get('update_on_save', True):
+			return
+		engine = Engine([], [], settings)
+		p = engine.resolve(path)
+		review = stored(rview)
+		listed = review is not None and p in review.files
+		if not listed and not self.in_scope(engine, view, args, path, p):
+			return
+		try:
+			reason = engine.precheck(p, os.stat(p))
+		except OSError:
+			reason = None
+		results = []
+		if reason is None:
+			results = engine.to_records(p, engine.matcher.scan_text(view.substr(sublime.Region(0, view.size()))))
+		# handed to the render rather than made global, the main thread may be using those
+		scan = register(engine.table, results, settings)
+		sublime.set_timeout(lambda: deliver(rview, {
+			"scan": scan,
+			"time": 0,
+			"count": 0,
+			"args": args,
+			"update": p
+		}), 0)
+
+	def on_close(self, view):
+		if view.settings().get('todo_results', False):
+			forget(view)
+
+	def in_scope(self, engine, view, args, path, p):
+		if args.get('current_file', False) or engine.excluded_file(path):
+			# a single file review only follows the file it was run on, which is listed
+			return False
+		paths, filepaths = targets(view, args, engine.settings)
+		if p in {engine.resolve(f) for f in filepaths}:
+			return True
+		return any(p.startswith(os.path.join(engine.resolve(d), '')) for d in paths)
+
+
+class TodoReviewIndexer(sublime_plugin.EventListener):
+	def on_load_project(self, window):
+		self.index(window)
+
+	def on_activated(self, view):
+		window = view.window()
+		# and again for a window whose watcher stopped
+		if window is not None and (window.id() not in indexes or not indexes[window.id()].thread.is_alive()):
+			self.index(window)
+
+	def index(self, window):
+		view = window.active_view()
+		if view is None:
+			return
+		# not the global settings: those belong to the last review, which may still be rendering
+		settings = Settings(view, False)
+		if not settings.get('watch', False):
+			return
+		paths, filepaths = targets(view, {}, settings)
+		watched(view, paths, filepaths, settings)
+		# the indexes of closed windows
+		alive = {w.id() for w in sublime.windows()}
+		for wid in [wid for wid in indexes if wid not in alive]:
+			indexes.pop(wid).stop()
 
 
 class TodoReviewResults(sublime_plugin.TextCommand):
@@ -465,7 +986,17 @@ class TodoReviewResults(sublime_plugin.TextCommand):
 		self.project_path = self.view.window().extract_variables()["project_path"]
 		self.version_settings = {}
 
-		if not self.settings.get('review_results'):
+		self.review = stored(self.view)
+		if self.review is None:
+			return
+		index = int(self.settings.get('selected_result', -1))
+		rows = self.review.rows
+		if -len(rows) <= index < len(rows) and rows[index] is None and (args.get('open') or
+				args.get('open_in_external_editor') or args.get('version') or args.get('toss')):
+			# a '... more' line has no file to act on, enter draws the next page of its section
+			if args.get('open'):
+				self.settings.set('selected_result', index % len(rows))
+				self.view.run_command('todo_review_render', {"expand": index % len(rows)})
 			return
 
 		if args.get('open_in_external_editor'):
@@ -560,11 +1091,8 @@ class TodoReviewResults(sublime_plugin.TextCommand):
 			return
 		if args.get('open'):
 			window = self.view.window()
-			index = int(self.settings.get('selected_result', -1))
-			result = self.view.get_regions('results')[index]
-			coords = '{0},{1}'.format(result.a, result.b)
-			i = self.settings.get('review_results')[coords]
-			p = "%f:%l".replace('%f', i['file']).replace('%l', str(i['line']))
+			file_name, i = self.selected()
+			p = "%f:%l".replace('%f', file_name).replace('%l', str(i.line))
 			view = window.open_file(p, sublime.ENCODED_POSITION)
 			window.focus_view(view)
 			return
@@ -687,12 +1215,8 @@ class TodoReviewResults(sublime_plugin.TextCommand):
 
 	def file_path_and_line(self, which_part):
 		#         window = self.view.window()
-		index = int(self.settings.get('selected_result', -1))
-		result = self.view.get_regions('results')[index]
-		coords = '{0},{1}'.format(result.a, result.b)
-		i = self.settings.get('review_results')[coords]
-		file_name = i['file']
-		line = i['line']
+		file_name, i = self.selected()
+		line = i.line
 		if which_part == 'path':
 			return file_name
 		elif which_part == 'name':
@@ -704,6 +1228,12 @@ class TodoReviewResults(sublime_plugin.TextCommand):
 		elif which_part == 'both':
 			return f"{file}:{line}"
 
+	def selected(self):
+		"""The selected result and the path of its file"""
+		index = int(self.settings.get('selected_result', -1))
+		i = self.review.rows[index]
+		return self.review.files[i.file], i
+
 	def prepared_target_paths(self, target_paths):
 		project_path = self.view.window().extract_variables()["project_path"]
 		for i, target_path in enumerate(target_paths):
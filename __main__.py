@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: headless TodoReview for CI and pre-commit hooks
+  Created: 2026-10-17 22:06:14
+
+  usage: python -m TodoReview scan [paths ...] [--settings FILE ...] [--set KEY=JSON ...]
+                                   [--format text|jsonl] [--fail-on PATTERN ...]
+                                   [--workers N] [--mode processes|threads] [--cache FOLDER]
+
+  Run from the folder that holds the TodoReview package folder (Sublime's Packages folder,
+  or wherever it was cloned to under that name). Settings come from the package's
+  TodoReview.sublime-settings, then each --settings file in order (a .sublime-project
+  file's "TodoReview" settings count too), then --set.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+from TodoReview.engine import Engine
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# sublime settings files allow comments and trailing commas, json doesn't; strings are
+# matched first so that nothing inside them is taken for either
+COMMENTS = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.DOTALL)
+TRAILING_COMMAS = re.compile(r'("(?:\\.|[^"\\])*")|,(\s*[}\]])')
+
+
+def load_settings(path: str) -> dict:
+	with open(path, 'r', encoding='utf-8') as f:
+		text = f.read()
+	text = COMMENTS.sub(lambda m: m.group(1) or '', text)
+	text = TRAILING_COMMAS.sub(lambda m: m.group(1) or m.group(2), text)
+	data = json.loads(text)
+	if path.endswith('.sublime-project'):
+		data = data.get('settings', {}).get('TodoReview', {})
+	return data
+
+
+def display_path(path: str) -> str:
+	rel = os.path.relpath(path)
+	return path if rel.startswith(os.pardir) else rel
+
+
+def scan(a) -> int:
+	settings = load_settings(os.path.join(ROOT, 'TodoReview.sublime-settings'))
+	for path in a.settings:
+		settings.update(load_settings(path))
+	for item in a.set:
+		key, value = item.split('=', 1)
+		settings[key] = json.loads(value)
+	# no UI to keep responsive here, so every core is used unless told otherwise
+	settings['scan_mode'] = a.mode
+	settings['scan_workers'] = a.workers or os.cpu_count() or 1
+	settings['cache'] = bool(a.cache)
+
+	paths = a.paths or [os.curdir]
+	dirpaths = [os.path.abspath(p) for p in paths if not os.path.isfile(p)]
+	filepaths = [os.path.abspath(p) for p in paths if os.path.isfile(p)]
+	engine = Engine(dirpaths, filepaths, settings, cache_folder=a.cache)
+	files = []
+	engine.progress = lambda size=0: files.append(size)
+	start = timeit.default_timer()
+	results = list(engine.process())
+
+	weights = settings.get('patterns_weight', {})
+	results.sort(key=lambda m: (str(weights.get(m.patt.upper(), m.patt)), m.priority))
+	out = sys.stdout
+	for item in results:
+		if a.format == 'jsonl':
+			out.write(json.dumps(item.to_dict(engine.table)) + '\n')
+		else:
+			out.write('{0}:{1}: {2}: {3}\n'.format(display_path(engine.table[item.file]), item.line, item.patt.upper(), item.note))
+	skipped = sum(engine.stats['skipped'].values())
+	sys.stderr.write('TodoReview: {0} results in {1} files ({2} skipped) in {3:.2f} secs\n'.format(
+		len(results), len(files), skipped, timeit.default_timer() - start))
+
+	fail_on = {name.upper() for names in a.fail_on for name in names.split(',') if name}
+	if any('*' in fail_on or item.patt.upper() in fail_on for item in results):
+		return 1
+	return 0
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(prog='python -m TodoReview')
+	commands = parser.add_subparsers(dest='command')
+	command = commands.add_parser('scan', help='list the comments matching the configured patterns')
+	command.add_argument('paths', nargs='*', help='folders and files to scan, the current folder by default')
+	command.add_argument('--settings', action='append', default=[], metavar='FILE',
+		help='a .sublime-settings or .sublime-project file, applied in order')
+	command.add_argument('--set', action='append', default=[], metavar='KEY=JSON', help='a single setting')
+	command.add_argument('--format', default='text', choices=['text', 'jsonl'])
+	command.add_argument('--fail-on', action='append', default=[], metavar='PATTERN',
+		help='exit with 1 when this pattern (or any, with *) is found; may be repeated or comma separated')
+	command.add_argument('--workers', type=int, default=0, help='scan workers, all cores by default')
+	command.add_argument('--mode', default='processes', choices=['processes', 'threads'])
+	command.add_argument('--cache', metavar='FOLDER', help='keep a scan cache in this folder')
+	a = parser.parse_args(argv)
+	if a.command != 'scan':
+		parser.print_help()
+		return 2
+	return scan(a)
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: time the scan engine phase by phase over a synthetic tree, as JSON for comparing runs
+  Created: 2026-10-17 21:48:52
+
+  usage: python bench/bench_engine.py [folder] [--files N] [--depth N] [--line-length N] [--lines N]
+                                      [--density F] [--excluded F] [--binary F] [--repeat N]
+                                      [--set key=json ...] [--output file.json]
+
+  Phases: files (Engine.files), extract (Engine.extract over the listed files), sort
+  (TodoReviewRender.sort) and render (the report text from TodoReviewRender.draw_block, without a view).
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+
+import stub
+import synth
+
+PATTERNS = {
+	'TODO': 'TODO[\\s]*?:[\\s]*(?P<todo>.*)$',
+	'NOTE': 'NOTE[\\s]*?:[\\s]*(?P<note>.*)$',
+	'FIXME': 'FIXME[\\s]*?:[\\s]*(?P<fixme>.*)$',
+}
+
+
+def render_text(render):
+	"""The report body draw_results would insert, built by the same draw_block calls"""
+	page = render.settings.get('render_page_size', 0)
+	out = []
+	for patt, items in render.sorted:
+		text, spans = render.draw_block(patt, items, min(page, len(items)) if page else len(items))
+		out.append(text)
+	return ''.join(out)
+
+
+def run(tr, folder):
+	"""One pass over the phases, returning the time each took and what they produced"""
+	counter = stub.Counter()
+	engine = tr.Engine([folder], [], tr.settings)
+	engine.progress = counter.increment
+	times = {}
+
+	start = timeit.default_timer()
+	files = list(engine.files())
+	times['files'] = timeit.default_timer() - start
+
+	start = timeit.default_timer()
+	results = list(engine.extract(files))
+	times['extract'] = timeit.default_timer() - start
+
+	render = tr.TodoReviewRender(stub.ViewStub())
+	render.settings = tr.settings
+	render.files = engine.table
+	render.results = results
+	start = timeit.default_timer()
+	# sort() returns a lazy groupby, the grouping is part of the cost
+	render.sorted = [(patt, list(items)) for patt, items in render.sort()]
+	times['sort'] = timeit.default_timer() - start
+
+	start = timeit.default_timer()
+	text = render_text(render)
+	times['render'] = timeit.default_timer() - start
+
+	return times, {'files': len(files), 'scanned': counter.i, 'bytes': counter.bytes,
+		'results': len(results), 'text': len(text), 'stats': engine.stats}
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('folder', nargs='?', help='benchmark an existing folder instead of a synthetic tree')
+	parser.add_argument('--files', type=int, default=2000)
+	parser.add_argument('--depth', type=int, default=3)
+	parser.add_argument('--line-length', type=int, default=60)
+	parser.add_argument('--lines', type=int, default=200)
+	parser.add_argument('--density', type=float, default=0.01, help='share of lines with a marker')
+	parser.add_argument('--excluded', type=float, default=0.1, help='share of files in excluded folders')
+	parser.add_argument('--binary', type=float, default=0.02, help='share of binary files')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--repeat', type=int, default=5)
+	parser.add_argument('--set', action='append', default=[], metavar='KEY=JSON', help='a TodoReview setting')
+	parser.add_argument('--output', help='write the JSON here instead of to stdout')
+	a = parser.parse_args()
+
+	user = {
+		'patterns': PATTERNS,
+		'exclude_folders': ['*%s*' % synth.EXCLUDED],
+		'exclude_files': [],
+		'cache': False,
+	}
+	for item in a.set:
+		key, value = item.split('=', 1)
+		user[key] = json.loads(value)
+	tr, user = stub.install(user)
+	tr.settings = tr.Settings(stub.ViewStub(), {})
+
+	report = {
+		'python': sys.version.split()[0],
+		'platform': platform.platform(),
+		'cpus': os.cpu_count(),
+		'settings': {key: value for key, value in user.items() if key != 'patterns'},
+	}
+	with tempfile.TemporaryDirectory() as tmp:
+		folder = a.folder
+		if folder:
+			report['tree'] = {'folder': os.path.abspath(folder)}
+		else:
+			folder = tmp
+			params = {'files': a.files, 'depth': a.depth, 'line_length': a.line_length, 'lines': a.lines,
+				'density': a.density, 'excluded': a.excluded, 'binary': a.binary, 'seed': a.seed}
+			report['tree'] = dict(params, written=synth.generate(folder, **params))
+		runs = [run(tr, folder) for _ in range(max(a.repeat, 1))]
+
+	report['counts'] = runs[-1][1]
+	report['timings'] = {phase: {
+		'min': min(times[phase] for times, counts in runs),
+		'median': statistics.median(times[phase] for times, counts in runs),
+	} for phase in runs[0][0]}
+	report['runs'] = [times for times, counts in runs]
+	text = json.dumps(report, indent='\t')
+	if a.output:
+		with open(a.output, 'w', encoding='utf-8') as f:
+			f.write(text + '\n')
+	else:
+		print(text)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: compare Engine.files() pruning through exclude_folders globs and through ignore files
+  Created: 2026-10-17 12:02:47
+
+  usage: python bench/bench_ignore.py [--folders N] [--files N] [--rules N] [--repeat N]
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+import stub
+
+IGNORED = ['node_modules', 'build', 'dist', '.cache']
+
+
+def build_tree(root, folders, files, rules):
+	for i in range(folders):
+		for sub in ['src', 'lib', 'docs'] + IGNORED:
+			folder = os.path.join(root, 'pkg%03d' % i, sub)
+			os.makedirs(folder, exist_ok=True)
+			for n in range(files):
+				with open(os.path.join(folder, 'f%03d.js' % n), 'w') as f:
+					f.write('// nothing here\n')
+	with open(os.path.join(root, '.gitignore'), 'w') as f:
+		for name in IGNORED:
+			f.write(name + '/\n')
+		# malformed sets must be skipped or read literally, not fail the walk
+		f.write('[]\n[]a]\n[!]\n[z-a]\n')
+		# filler rules that never match, to see how the matchers scale with the rule count
+		for n in range(rules):
+			f.write('generated-%d/\n*.tmp%d\n' % (n, n))
+
+
+def run(tr, root, user):
+	tr.settings = tr.Settings(stub.ViewStub(), user)
+	engine = tr.Engine([root], [], tr.settings)
+	start = timeit.default_timer()
+	files = list(engine.files())
+	return timeit.default_timer() - start, len(files), engine.stats
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--folders', type=int, default=100)
+	parser.add_argument('--files', type=int, default=20)
+	parser.add_argument('--rules', type=int, default=25)
+	parser.add_argument('--repeat', type=int, default=3)
+	a = parser.parse_args()
+
+	tr, user = stub.install({'patterns': {'TODO': 'TODO:(?P<todo>.*)$'}})
+	globs = ['*%s*' % name for name in IGNORED]
+	for n in range(a.rules):
+		globs += ['*generated-%d*' % n, '*.tmp%d' % n]
+	variants = [
+		('exclude_folders', {'exclude_folders': globs, 'exclude_files': [], 'cache': False}),
+		('ignore_files', {'exclude_folders': [], 'exclude_files': [], 'ignore_files': ['.gitignore'], 'cache': False}),
+	]
+	with tempfile.TemporaryDirectory() as root:
+		build_tree(root, a.folders, a.files, a.rules)
+		for name, settings in variants:
+			best, count, stats = min((run(tr, root, settings) for _ in range(a.repeat)), key=lambda r: r[0])
+			print('%-16s %7.3f s  %6d files  pruned %d folders, %d files' % (
+				name, best, count, stats['pruned_folders'], stats['pruned_files']))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: time todo_review_render drawing a large review into a results view, as JSON
+  Created: 2026-10-17 23:14:38
+
+  usage: python bench/bench_render.py [--results N] [--per-file N] [--patterns N] [--call-cost US]
+                                      [--repeat N] [--set key=json ...] [--output file.json]
+
+  The view is a stand-in that keeps the text and counts the calls that would go to Sublime
+  Text; each of those crosses over to the editor, so 'estimated' adds --call-cost
+  microseconds per call to the time measured here. 'per_row' is the drawing draw_results
+  replaced, an insert and two size() calls per row, timed the same way for comparison.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import timeit
+
+import stub
+
+
+def records(count, per_file, patterns, seed):
+	from TodoReview.results import FileTable, Result
+	rnd = random.Random(seed)
+	files = FileTable()
+	names = ['PATT%d' % i for i in range(patterns)]
+	items = [Result(files.intern('/home/user/project/src/module%d/file%05d.py' % (i // per_file % 50, i // per_file)),
+		rnd.choice(names).lower(), 'item %d of the backlog @tag [note]' % i, rnd.randint(1, 5000), rnd.randint(0, 99))
+		for i in range(count)]
+	return files, items
+
+
+def per_row(tr):
+	"""TodoReviewRender drawing the way it did before draw_results built the report in one piece"""
+
+	class PerRowRender(tr.TodoReviewRender):
+		def draw_results(self, header):
+			self.rview.insert(self.edit, self.rview.size(), header)
+			regions = []
+			sections = []
+			for patt, items in self.sorted:
+				items = list(items)
+				self.rview.insert(self.edit, self.rview.size(), self.draw_section(patt, len(items)))
+				for idx, item in enumerate(items, 1):
+					start = self.rview.size()
+					self.rview.insert(self.edit, start, self.draw_line(idx, item))
+					regions.append(tr.sublime.Region(start, self.rview.size()))
+				sections.append([patt, items, len(items)])
+			self.rview.add_regions('results', regions, '')
+			tr.store(self.rview, tr.Review(self.files, sections, self.largest))
+
+	return PerRowRender
+
+
+def run(tr, window, files, items, render):
+	"""One render of every item into a fresh results view: seconds taken and calls made"""
+	del window.views()[:]
+	view = stub.BufferView(window)
+	window.views().append(view)
+	scan = tr.register(files, items, tr.settings)
+	start = timeit.default_timer()
+	render(view).run(None, scan, 1.0, len(files), {}, {})
+	elapsed = timeit.default_timer() - start
+	results = [v for v in window.views() if v.settings().get('todo_results')][0]
+	return elapsed, results.calls, results.length
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--results', type=int, default=50000)
+	parser.add_argument('--per-file', type=int, default=5, help='results per file')
+	parser.add_argument('--patterns', type=int, default=3)
+	parser.add_argument('--call-cost', type=float, default=20.0, help='microseconds per call to Sublime Text')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--set', action='append', default=[], metavar='KEY=JSON', help='a TodoReview setting')
+	parser.add_argument('--output', help='write the JSON here instead of to stdout')
+	a = parser.parse_args()
+
+	user = {}
+	for item in a.set:
+		key, value = item.split('=', 1)
+		user[key] = json.loads(value)
+	tr, user = stub.install(user)
+	window = stub.WindowStub(['/home/user/project'])
+	tr.sublime.active_window = lambda: window
+	# the saved copy of the results is written off the main thread, it isn't part of the render
+	tr.sublime.set_timeout_async = lambda callback, delay=0: None
+	tr.settings = tr.Settings(stub.ViewStub(), {})
+
+	files, items = records(a.results, a.per_file, a.patterns, a.seed)
+	report = {
+		'python': sys.version.split()[0],
+		'platform': platform.platform(),
+		'results': a.results,
+		'files': len(files),
+	}
+	for name, render in (('draw_results', tr.TodoReviewRender), ('per_row', per_row(tr))):
+		runs = [run(tr, window, files, items, render) for _ in range(max(a.repeat, 1))]
+		times = [elapsed for elapsed, calls, length in runs]
+		calls = runs[-1][1]
+		report[name] = {
+			'calls': calls,
+			'text': runs[-1][2],
+			'render': {'min': min(times), 'median': statistics.median(times)},
+			'estimated': min(times) + calls * a.call_cost / 1e6,
+		}
+	text = json.dumps(report, indent='\t')
+	if a.output:
+		with open(a.output, 'w', encoding='utf-8') as f:
+			f.write(text + '\n')
+	else:
+		print(text)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: compare the memory taken by result dicts and by Result records with a file table
+  Created: 2026-10-17 22:52:09
+
+  usage: python bench/bench_results.py [--results N] [--per-file N] [--path-length N]
+
+  The dicts are built the way they arrive from run_command, every one with its own copy
+  of the path; the records share one FileTable.
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+import stub
+
+
+def measure(build):
+	"""Bytes allocated by build() that are still alive, and what it built"""
+	gc.collect()
+	tracemalloc.start()
+	built = build()
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return size, built
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--results', type=int, default=150000)
+	parser.add_argument('--per-file', type=int, default=5, help='results per file')
+	parser.add_argument('--path-length', type=int, default=80)
+	a = parser.parse_args()
+
+	stub.install()
+	from TodoReview.results import FileTable, Result
+
+	base = '/home/user/projects/' + 'x' * max(a.path_length - 40, 1) + '/src/'
+	hits = [(i // a.per_file, ('todo', 'note', 'fixme')[i % 3], 'item %d of the backlog' % i, i % 500 + 1, i % 100)
+		for i in range(a.results)]
+
+	def dicts():
+		# json.loads gives every result its own path string
+		return [{'file': ''.join([base, 'f%06d.py' % f]), 'patt': patt, 'note': note, 'line': line, 'priority': priority}
+			for f, patt, note, line, priority in hits]
+
+	def records():
+		files = FileTable()
+		return files, [Result(files.intern(''.join([base, 'f%06d.py' % f])), patt, note, line, priority)
+			for f, patt, note, line, priority in hits]
+
+	dict_size, built = measure(dicts)
+	del built
+	record_size, built = measure(records)
+	print(json.dumps({
+		'results': a.results,
+		'files': len(built[0]),
+		'dicts': dict_size,
+		'records': record_size,
+		'saved': round(1 - record_size / dict_size, 3),
+	}, indent='\t'))
+
+
+if __name__ == '__main__':
+	main()
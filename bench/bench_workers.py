@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: compare Engine.extract throughput across scan_workers and scan_mode settings
+  Created: 2026-10-17 09:31:05
+
+  usage: python bench/bench_workers.py [folder] [--files N] [--workers 1,4,16] [--repeat N]
+                                       [--mode threads|processes] [--patterns N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import timeit
+
+import stub
+
+
+def build_tree(root, files, lines=200):
+	rnd = random.Random(0)
+	for i in range(files):
+		folder = os.path.join(root, 'd%02d' % (i % 50))
+		os.makedirs(folder, exist_ok=True)
+		with open(os.path.join(folder, 'f%05d.py' % i), 'w', encoding='utf-8') as f:
+			for n in range(lines):
+				if rnd.random() < 0.01:
+					f.write('    # TODO: item %d of file %d (%d)\n' % (n, i, rnd.randint(0, 99)))
+				else:
+					f.write('    value_%d = compute(%d, "%s")\n' % (n, n, 'x' * 40))
+
+
+def make_patterns(count):
+	patterns = {'TODO': 'TODO[\\s]*?:[\\s]*(?P<todo>.*)$'}
+	for i in range(1, count):
+		patterns['MARK%d' % i] = 'MARK%d[\\s]*?:[\\s]*(?P<mark%d>.*)$' % (i, i)
+	return patterns
+
+
+def run(tr, folder, workers, mode):
+	tr.settings = tr.Settings(stub.ViewStub(), {'scan_workers': workers, 'scan_mode': mode})
+	counter = stub.Counter()
+	engine = tr.Engine([folder], [], tr.settings)
+	engine.progress = counter.increment
+	start = timeit.default_timer()
+	results = list(engine.process())
+	elapsed = timeit.default_timer() - start
+	# file ids depend on which thread got to a file first, the paths they stand for don't
+	return elapsed, counter.i, [item.to_dict(engine.table) for item in results]
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('folder', nargs='?')
+	parser.add_argument('--files', type=int, default=2000)
+	parser.add_argument('--workers', default='1,4,16')
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--mode', default='threads', choices=['threads', 'processes'])
+	parser.add_argument('--patterns', type=int, default=1, help='number of case insensitive patterns')
+	a = parser.parse_args()
+
+	tr, user = stub.install({'patterns': make_patterns(a.patterns), 'case_sensitive': False, 'cache': False})
+	print('mode=%s, %d patterns, %d cpus' % (a.mode, a.patterns, os.cpu_count()))
+	with tempfile.TemporaryDirectory() as tmp:
+		folder = a.folder
+		if not folder:
+			folder = tmp
+			build_tree(folder, a.files)
+		baseline = None
+		for workers in [int(w) for w in a.workers.split(',')]:
+			best, count, results = min((run(tr, folder, workers, a.mode) for _ in range(a.repeat)), key=lambda r: r[0])
+			if baseline is None:
+				baseline = results
+			same = 'same' if results == baseline else 'DIFFERENT'
+			print('workers=%-3d %6d files %7.3f s %9.0f files/s  %d results (%s)' % (
+				workers, count, best, count / best, len(results), same))
+
+
+if __name__ == '__main__':
+	main()
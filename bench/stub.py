@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: minimal sublime/sublime_plugin stand-ins so the engine can be benchmarked outside Sublime Text
+  Created: 2026-10-17 09:12:40
+"""
+
+import importlib
+import importlib.machinery
+import importlib.util
+import itertools
+import os
+import sys
+import tempfile
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Region():
+	def __init__(self, a, b=None):
+		self.a = a
+		self.b = a if b is None else b
+
+	def begin(self):
+		return min(self.a, self.b)
+
+	def end(self):
+		return max(self.a, self.b)
+
+	def size(self):
+		return abs(self.b - self.a)
+
+	def cover(self, other):
+		return Region(min(self.begin(), other.begin()), max(self.end(), other.end()))
+
+
+class SettingsStub(dict):
+	def get(self, key, default=None):
+		return dict.get(self, key, default)
+
+	def set(self, key, value):
+		self[key] = value
+
+	def erase(self, key):
+		self.pop(key, None)
+
+	def to_dict(self):
+		return dict(self)
+
+
+class WindowStub():
+	def __init__(self, folders=None):
+		self._folders = folders or []
+		self._views = []
+
+	def views(self):
+		return self._views
+
+	def new_file(self):
+		view = BufferView(self)
+		self._views.append(view)
+		return view
+
+	def focus_view(self, view):
+		pass
+
+	def folders(self):
+		return self._folders
+
+	def extract_variables(self):
+		return {"project_path": self._folders[0] if self._folders else ""}
+
+
+class ViewStub():
+	def __init__(self, window=None):
+		self._window = window or WindowStub()
+		self._settings = SettingsStub()
+
+	def window(self):
+		return self._window
+
+	def settings(self):
+		return self._settings
+
+	def file_name(self):
+		return None
+
+
+class BufferView(ViewStub):
+	"""A results view that keeps its text and regions, counting the calls that would cross
+	over to Sublime Text"""
+	ids = itertools.count(1)
+
+	def __init__(self, window=None):
+		ViewStub.__init__(self, window)
+		self._id = next(self.ids)
+		self.chunks = []
+		self.length = 0
+		self.regions = {}
+		self.calls = 0
+
+	def id(self):
+		return self._id
+
+	def text(self):
+		if len(self.chunks) > 1:
+			self.chunks = [''.join(self.chunks)]
+		return self.chunks[0] if self.chunks else ''
+
+	def size(self):
+		self.calls += 1
+		return self.length
+
+	def insert(self, edit, pt, text):
+		self.calls += 1
+		if pt == self.length:
+			# appending is what rendering does most, it doesn't rebuild the text
+			self.chunks.append(text)
+		else:
+			current = self.text()
+			self.chunks = [current[:pt], text, current[pt:]]
+		self.length += len(text)
+		return len(text)
+
+	def replace(self, edit, region, text):
+		self.calls += 1
+		current = self.text()
+		self.chunks = [current[:region.begin()], text, current[region.end():]]
+		self.length += len(text) - region.size()
+
+	def erase(self, edit, region):
+		self.replace(edit, region, '')
+
+	def substr(self, region):
+		self.calls += 1
+		return self.text()[region.begin():region.end()]
+
+	def add_regions(self, key, regions, *args, **kwargs):
+		self.calls += 1
+		self.regions[key] = list(regions)
+
+	def get_regions(self, key):
+		self.calls += 1
+		return list(self.regions.get(key, []))
+
+	def erase_regions(self, key):
+		self.calls += 1
+		self.regions.pop(key, None)
+
+	def set_name(self, name):
+		pass
+
+	def set_scratch(self, scratch):
+		pass
+
+	def assign_syntax(self, syntax):
+		pass
+
+	def show(self, *args, **kwargs):
+		pass
+
+
+def install(user_settings=None):
+	"""Register the stand-ins and import the TodoReview plugin module"""
+	user = SettingsStub(user_settings or {})
+	sublime = types.ModuleType('sublime')
+	sublime.Region = Region
+	sublime.load_settings = lambda name: user
+	sublime.status_message = lambda message: None
+	sublime.message_dialog = print
+	sublime.error_message = print
+	sublime.set_timeout = lambda callback, delay=0: callback()
+	sublime.set_timeout_async = lambda callback, delay=0: callback()
+	sublime.platform = lambda: sys.platform
+	sublime.active_window = lambda: None
+	sublime.windows = lambda: []
+	sublime.cache_path = lambda: os.path.join(tempfile.gettempdir(), 'TodoReview-bench')
+	sys.modules['sublime'] = sublime
+
+	sublime_plugin = types.ModuleType('sublime_plugin')
+	sublime_plugin.TextCommand = type('TextCommand', (), {'__init__': lambda self, view=None: setattr(self, 'view', view)})
+	sublime_plugin.WindowCommand = type('WindowCommand', (), {'__init__': lambda self, window=None: setattr(self, 'window', window)})
+	sublime_plugin.EventListener = type('EventListener', (), {})
+	sys.modules['sublime_plugin'] = sublime_plugin
+
+	# the package directory is only named TodoReview inside Sublime's Packages folder
+	if 'TodoReview' not in sys.modules:
+		spec = importlib.machinery.ModuleSpec('TodoReview', None, is_package=True)
+		spec.submodule_search_locations = [ROOT]
+		sys.modules['TodoReview'] = importlib.util.module_from_spec(spec)
+	return importlib.import_module('TodoReview.TodoReview'), user
+
+
+class Counter():
+	"""Stands in for the scan Thread's progress counter, set as an Engine's progress hook"""
+	def __init__(self):
+		self.i = 0
+		self.bytes = 0
+
+	def increment(self, size=0):
+		self.i += 1
+		self.bytes += size
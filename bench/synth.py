@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: synthetic source trees to benchmark the scan engine on
+  Created: 2026-10-17 21:41:16
+
+  usage: python bench/synth.py folder [--files N] [--depth N] [--line-length N] [--lines N]
+                                      [--density F] [--excluded F] [--binary F] [--seed N]
+"""
+
+import argparse
+import json
+import os
+import random
+
+MARKERS = ['TODO', 'NOTE', 'FIXME']
+# the folder name excluded files go to; bench runs exclude it with exclude_folders
+EXCLUDED = 'node_modules'
+# subfolders per folder
+FANOUT = 3
+EXTENSIONS = ['.py', '.js', '.sql', '.c', '.txt']
+
+
+def generate(root, files=2000, depth=3, line_length=60, lines=200, density=0.01, excluded=0.1, binary=0.02, seed=0):
+	"""Write files spread over a folder tree depth levels deep. density is the share of lines
+	with a marker, excluded the share of files under EXCLUDED folders and binary the share of
+	files with binary content. Returns what was written"""
+	rnd = random.Random(seed)
+	folders = ['']
+	level = ['']
+	for _ in range(depth):
+		level = [os.path.join(parent, 'd%d' % i) for parent in level for i in range(FANOUT)]
+		folders += level
+	filler = ''.join(chr(rnd.randint(97, 122)) for _ in range(max(line_length, 1)))
+	counts = {'files': 0, 'excluded': 0, 'binary': 0, 'markers': 0, 'bytes': 0}
+	for i in range(files):
+		folder = folders[rnd.randrange(len(folders))]
+		if rnd.random() < excluded:
+			folder = os.path.join(folder, EXCLUDED)
+			counts['excluded'] += 1
+		path = os.path.join(root, folder, 'f%05d%s' % (i, rnd.choice(EXTENSIONS)))
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		if rnd.random() < binary:
+			data = bytes(rnd.randrange(256) for _ in range(lines * line_length))
+			counts['binary'] += 1
+		else:
+			out = []
+			for n in range(lines):
+				if rnd.random() < density:
+					marker = rnd.choice(MARKERS)
+					out.append('// %s: item %d of file %d (%d)\n' % (marker, n, i, rnd.randint(0, 99)))
+					counts['markers'] += 1
+				else:
+					start = rnd.randrange(len(filler))
+					out.append('    ' + (filler[start:] + filler[:start])[:line_length - 4] + '\n')
+			data = ''.join(out).encode('utf-8')
+		with open(path, 'wb') as f:
+			f.write(data)
+		counts['files'] += 1
+		counts['bytes'] += len(data)
+	return counts
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('folder')
+	parser.add_argument('--files', type=int, default=2000)
+	parser.add_argument('--depth', type=int, default=3)
+	parser.add_argument('--line-length', type=int, default=60)
+	parser.add_argument('--lines', type=int, default=200)
+	parser.add_argument('--density', type=float, default=0.01, help='share of lines with a marker')
+	parser.add_argument('--excluded', type=float, default=0.1, help='share of files in excluded folders')
+	parser.add_argument('--binary', type=float, default=0.02, help='share of binary files')
+	parser.add_argument('--seed', type=int, default=0)
+	a = parser.parse_args()
+	print(json.dumps(generate(
+		a.folder, a.files, a.depth, a.line_length, a.lines, a.density, a.excluded, a.binary, a.seed)))
+
+
+if __name__ == '__main__':
+	main()
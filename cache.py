@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: on-disk cache of scan results keyed by path, mtime and size
+  Created: 2026-10-17 10:48:51
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+CACHE_VERSION = 2
+# cache files no scan has written for this long belong to folders that aren't opened anymore
+CACHE_MAX_AGE = 30 * 24 * 60 * 60
+# only what cache_file names, the folder given to the command line may hold other files
+CACHE_NAME = re.compile(r'[0-9a-f]{40}\.json$')
+
+
+def signature(*parts) -> str:
+	"""Hash of everything that changes what a scan extracts from an unchanged file"""
+	return hashlib.sha1(json.dumps([CACHE_VERSION, parts], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def cache_file(folder: str, roots: list) -> str:
+	"""One cache file per set of scanned folders; reviews of single files all share one"""
+	name = hashlib.sha1('\n'.join(sorted(roots)).encode('utf-8')).hexdigest()
+	return os.path.join(folder, f'{name}.json')
+
+
+def prune(folder: str, keep: str, age: float = CACHE_MAX_AGE):
+	"""Delete the cache files in folder that haven't been written for age seconds, except keep"""
+	limit = time.time() - age
+	try:
+		entries = list(os.scandir(folder))
+	except OSError:
+		return
+	for entry in entries:
+		if not CACHE_NAME.match(entry.name) or entry.path == keep:
+			continue
+		try:
+			if entry.is_file() and entry.stat().st_mtime < limit:
+				os.remove(entry.path)
+		except OSError:
+			pass
+
+
+class ScanCache():
+	"""Maps each path to its (mtime_ns, size), the hits extracted from it and what the scan
+	learned about the file (why it was skipped, for instance)"""
+
+	def __init__(self, path: str, signature: str):
+		self.path = path
+		self.signature = signature
+		self.entries = {}
+		self.seen = set()
+		self.hits = 0
+		self.misses = 0
+		self.lock = threading.Lock()
+		self.load()
+
+	def load(self):
+		try:
+			with open(self.path, 'r', encoding='utf-8') as f:
+				data = json.load(f)
+		except(OSError, ValueError):
+			return
+		# a different pattern set or encoding invalidates everything
+		if isinstance(data, dict) and data.get('signature') == self.signature:
+			self.entries = data.get('entries', {})
+
+	def get(self, path: str, st):
+		entry = self.entries.get(path)
+		with self.lock:
+			self.seen.add(path)
+			if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+				self.hits += 1
+				return entry[2], entry[3]
+			self.misses += 1
+		return None
+
+	def put(self, path: str, st, hits: list, info: dict = None):
+		with self.lock:
+			self.entries[path] = [st.st_mtime_ns, st.st_size, hits, info]
+
+	def save(self):
+		# files that weren't seen in this scan were deleted or excluded since
+		entries = {p: e for p, e in self.entries.items() if p in self.seen}
+		folder = os.path.dirname(self.path)
+		os.makedirs(folder, exist_ok=True)
+		fd, temp = tempfile.mkstemp(prefix='.scan-', suffix='.tmp', dir=folder)
+		try:
+			with os.fdopen(fd, 'w', encoding='utf-8') as f:
+				json.dump({'signature': self.signature, 'entries': entries}, f, separators=(',', ':'))
+				f.flush()
+				os.fsync(f.fileno())
+			# the rename is atomic, a crash leaves either the old or the new cache behind
+			os.replace(temp, self.path)
+		except BaseException:
+			try:
+				os.remove(temp)
+			except OSError:
+				pass
+			raise
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: the scanning core: file discovery and extraction, without sublime
+  Created: 2026-10-17 21:58:30
+"""
+
+import collections
+import concurrent.futures
+import fnmatch
+import multiprocessing
+import os
+import queue
+import re
+import stat
+import subprocess
+import sys
+import threading
+
+from TodoReview import scanner
+from TodoReview.cache import ScanCache, cache_file, prune, signature
+from TodoReview.ignore import IgnoreRules
+from TodoReview.results import FileTable, Result
+
+
+def compile_globs(globs):
+	if not globs:
+		return None
+	return re.compile('|'.join(fnmatch.translate(p) for p in globs))
+
+
+class Engine():
+	"""Finds the files of a review and extracts the comments matching its patterns, as
+	Result records whose files are in table. settings is anything with a get(key, default)
+	method; progress is called with the size of every file done, and setting cancelled
+	stops the scan at the next file"""
+
+	def __init__(self, dirpaths, filepaths, settings, cancelled=None, buffers=None, cache_folder=None):
+		self.settings = settings
+		self.cancelled = cancelled or threading.Event()
+		self.progress = lambda size=0: None
+		self.dirpaths = dirpaths
+		self.filepaths = filepaths
+		self.case_sensitive = self.settings.get('case_sensitive', False)
+		self.patterns = self.settings.get('patterns', {})
+		patt_files = self.settings.get('exclude_files', [])
+		patt_folders = self.settings.get('exclude_folders', [])
+
+		self.match_mode = self.settings.get('match_mode', 'buffer')
+		self.mmap_min_size = self.settings.get('mmap_min_size', 0)
+		self.matcher = scanner.Matcher(self.patterns, self.case_sensitive, self.match_mode, self.mmap_min_size)
+		self.exclude_files = compile_globs(patt_files)
+		self.exclude_folders = compile_globs(patt_folders)
+		self.max_depth = self.settings.get('max_depth', None)
+		self.file_source = self.settings.get('file_source', 'walk')
+		self.ignore_files = self.settings.get('ignore_files', []) or []
+		self.encoding = self.settings.get('encoding', 'utf-8')
+		self.encoding_fallbacks = self.settings.get('encoding_fallbacks', []) or []
+		self.encoding_overrides = self.settings.get('encoding_overrides', {}) or {}
+		self.decoder = scanner.Decoder(self.encoding, self.encoding_fallbacks, self.encoding_overrides)
+		self.cache = None
+		self.cache_folder = cache_folder if self.settings.get('cache', True) else None
+		self.max_file_size = self.settings.get('max_file_size', 0)
+		self.include_extensions = self.extensions(self.settings.get('include_extensions', []))
+		self.exclude_extensions = self.extensions(self.settings.get('exclude_extensions', []))
+		self.reset_stats()
+		# True while process() is still listing files, until then 'discovered' isn't the total
+		self.discovering = False
+		self.lock = threading.Lock()
+		# open files' text by path, scanned instead of what is on disk
+		self.buffers = buffers or {}
+		# the paths the results refer to
+		self.table = FileTable()
+
+	def reset_stats(self):
+		self.stats = {'discovered': 0, 'pruned_folders': 0, 'pruned_files': 0, 'skipped': {'binary': 0, 'size': 0, 'extension': 0}}
+
+	def files(self):
+		seen = set()
+		for filepath in self.filepaths:
+			if self.excluded_file(filepath):
+				continue
+			p = self.resolve(filepath)
+			try:
+				st = os.stat(p)
+			except OSError:
+				continue
+			key = self.file_key(p, st)
+			if key in seen:
+				continue
+			# os.stat() fills in st_ino where the walk's DirEntry.stat() doesn't (Windows),
+			# the path is kept too so that the walk finding this file again matches it
+			seen.add(key)
+			seen.add(os.path.normcase(p))
+			if self.cancelled.is_set():
+				return
+			self.stats['discovered'] += 1
+			yield p, st
+		for dirpath in self.dirpaths:
+			root = self.resolve(dirpath)
+			found = self.git_files(root) if self.file_source == 'git' else None
+			if found is None:
+				found = self.walk(root)
+			for p, st in found:
+				key = self.file_key(p, st)
+				if key in seen:
+					continue
+				seen.add(key)
+				if self.cancelled.is_set():
+					return
+				self.stats['discovered'] += 1
+				yield p, st
+
+	def ahead(self, files):
+		"""files, listed by a thread of its own so that 'discovered' runs ahead of the scan"""
+		found = queue.Queue()
+		stop = threading.Event()
+		done = object()
+
+		def produce():
+			try:
+				for item in files:
+					if stop.is_set():
+						break
+					found.put(item)
+			except BaseException as e:
+				found.put(e)
+			finally:
+				files.close()
+				self.discovering = False
+				found.put(done)
+
+		self.discovering = True
+		threading.Thread(target=produce, name='TodoReview files', daemon=True).start()
+		try:
+			while True:
+				item = found.get()
+				if item is done:
+					return
+				if isinstance(item, BaseException):
+					raise item
+				yield item
+		finally:
+			# the scan stopped early, so does the listing
+			stop.set()
+
+	def walk(self, root):
+		if self.excluded(self.exclude_folders, root):
+			self.stats['pruned_folders'] += 1
+			return
+		try:
+			visited = {self.file_key(root, os.stat(root))}
+		except OSError:
+			return
+		resolve_symlinks = self.settings.get('resolve_symlinks', True)
+		# (walked path, resolved path, depth, parent's ignore rules); the resolved path
+		# and the ignore rules are computed once per directory
+		stack = [(root, root, 0, None)]
+		while stack:
+			dirp, realp, depth, rules = stack.pop()
+			try:
+				with os.scandir(dirp) as it:
+					entries = list(it)
+			except OSError:
+				continue
+			if self.ignore_files:
+				if dirp == root:
+					rules = IgnoreRules.for_root(root, self.ignore_files)
+				else:
+					rules = IgnoreRules.load(dirp, self.ignore_files, rules, {e.name for e in entries})
+			subdirs = []
+			for entry in entries:
+				path = os.path.join(dirp, entry.name)
+				try:
+					if entry.is_dir():
+						if self.excluded(self.exclude_folders, path) or \
+							(self.max_depth is not None and depth >= self.max_depth) or \
+							(rules is not None and rules.ignored(path, True)):
+							self.stats['pruned_folders'] += 1
+							continue
+						st = entry.stat()
+						if not st.st_ino:
+							# on Windows DirEntry.stat() leaves st_ino at 0, without it a junction
+							# back up the tree would be walked until the path gets too long
+							st = os.stat(path)
+						key = self.file_key(path, st)
+						if key in visited:
+							# a symlink back into a directory we already walked
+							continue
+						visited.add(key)
+						if resolve_symlinks and entry.is_symlink():
+							subdirs.append((path, os.path.realpath(path), depth + 1, rules))
+						else:
+							subdirs.append((path, os.path.join(realp, entry.name), depth + 1, rules))
+					elif entry.is_file():
+						if rules is not None and rules.ignored(path, False):
+							self.stats['pruned_files'] += 1
+							continue
+						if self.excluded_file(path):
+							continue
+						st = entry.stat()
+						if resolve_symlinks and entry.is_symlink():
+							yield os.path.realpath(path), st
+						else:
+							yield os.path.join(realp, entry.name), st
+				except OSError:
+					continue
+			# reversed so the walk stays top-down in directory listing order, like os.walk
+			stack.extend(reversed(subdirs))
+
+	def git_files(self, root):
+		if self.excluded(self.exclude_folders, root):
+			self.stats['pruned_folders'] += 1
+			return []
+		startupinfo = None
+		if sys.platform == 'win32':
+			startupinfo = subprocess.STARTUPINFO()
+			startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+		try:
+			proc = subprocess.run(
+				['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+				cwd=root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+				startupinfo=startupinfo, timeout=60)
+		except(OSError, subprocess.SubprocessError):
+			return None
+		if proc.returncode != 0:
+			# not a repository (or no git at all), walk it instead
+			return None
+		return self.git_paths(root, proc.stdout.decode('utf-8', 'surrogateescape').split('\0'))
+
+	def git_paths(self, root, names):
+		for name in names:
+			if not name:
+				continue
+			if self.max_depth is not None and name.count('/') > self.max_depth:
+				self.stats['pruned_files'] += 1
+				continue
+			path = os.path.join(root, os.path.normpath(name))
+			if self.excluded_file(path):
+				continue
+			try:
+				st = os.stat(path)
+			except OSError:
+				# tracked, but deleted from the working tree
+				continue
+			if stat.S_ISREG(st.st_mode):
+				yield path, st
+
+	def file_key(self, path, st):
+		# st_ino is not filled in by DirEntry.stat() on Windows, files fall back to their path
+		return (st.st_dev, st.st_ino) if st.st_ino else os.path.normcase(path)
+
+	def excluded_file(self, path):
+		if self.excluded(self.exclude_folders, path) or self.excluded(self.exclude_files, path):
+			self.stats['pruned_files'] += 1
+			return True
+		return False
+
+	def excluded(self, matcher, path):
+		return matcher is not None and matcher.search(path) is not None
+
+	def admits(self, path, is_dir=False):
+		"""Whether listing the folders would take in path, a file or a folder to go into,
+		worked out for that path alone; None when only listing them can tell"""
+		if self.excluded(self.exclude_folders, path) or (not is_dir and self.excluded(self.exclude_files, path)):
+			return False
+		for dirpath in self.dirpaths:
+			root = self.resolve(dirpath)
+			if not path.startswith(os.path.join(root, '')):
+				continue
+			if self.excluded(self.exclude_folders, root):
+				return False
+			folders = os.path.relpath(path, root).split(os.sep)[:-1]
+			# a folder at the depth limit isn't gone into, the files in it are listed
+			if self.max_depth is not None and len(folders) > (self.max_depth - 1 if is_dir else self.max_depth):
+				return False
+			if self.file_source == 'git':
+				ignored = self.git_ignored(root, path)
+				if ignored is not None:
+					return not ignored
+			rules = IgnoreRules.for_root(root, self.ignore_files) if self.ignore_files else None
+			folder = root
+			for name in folders:
+				folder = os.path.join(folder, name)
+				if self.excluded(self.exclude_folders, folder) or (rules is not None and rules.ignored(folder, True)):
+					return False
+				if self.ignore_files:
+					rules = IgnoreRules.load(folder, self.ignore_files, rules)
+			return rules is None or not rules.ignored(path, is_dir)
+		return None
+
+	def git_ignored(self, root, path):
+		"""Whether git ignores path, None when root isn't a repository git can be asked about"""
+		startupinfo = None
+		if sys.platform == 'win32':
+			startupinfo = subprocess.STARTUPINFO()
+			startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+		try:
+			proc = subprocess.run(
+				['git', 'check-ignore', '-q', '--', path], cwd=root, stdout=subprocess.DEVNULL,
+				stderr=subprocess.DEVNULL, startupinfo=startupinfo, timeout=60)
+		except(OSError, subprocess.SubprocessError):
+			return None
+		# 0 when ignored, 1 when not, anything else is an error
+		return {0: True, 1: False}.get(proc.returncode)
+
+	def extract(self, files):
+		workers = max(int(self.settings.get('scan_workers', 1) or 1), 1)
+		if self.settings.get('scan_mode', 'threads') == 'processes':
+			context = self.process_context()
+			if context is not None:
+				yield from self.extract_processes(files, context, workers if workers > 1 else os.cpu_count() or 1)
+				return
+		if workers == 1:
+			for p, st in files:
+				if self.cancelled.is_set():
+					return
+				yield from self.extract_file(p, st)
+			return
+		with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+			# a bounded window of futures, drained in submission order, keeps the
+			# output identical to a sequential scan without queueing every file up front
+			pending = collections.deque()
+			for p, st in files:
+				pending.append(pool.submit(self.extract_file, p, st))
+				if len(pending) >= workers * 4:
+					yield from pending.popleft().result()
+				if self.cancelled.is_set():
+					break
+			while pending:
+				if self.cancelled.is_set():
+					for future in pending:
+						future.cancel()
+					return
+				yield from pending.popleft().result()
+
+	def extract_processes(self, files, context, workers):
+		files = list(files)
+		size = max(16, min(512, len(files) // (workers * 8)))
+		chunks = [files[i:i + size] for i in range(0, len(files), size)]
+		with concurrent.futures.ProcessPoolExecutor(
+			max_workers=workers, mp_context=context, initializer=scanner.init_worker,
+			initargs=(self.patterns, self.case_sensitive, self.match_mode, self.mmap_min_size, self.decoder)) as pool:
+			jobs = []
+			for chunk in chunks:
+				entries = {}
+				paths = []
+				for p, st in chunk:
+					# open buffers are already in memory, they are scanned here
+					if p in self.buffers:
+						continue
+					reason = self.precheck(p, st)
+					entry = self.cache.get(p, st) if self.cache is not None and reason is None else None
+					if reason is not None:
+						entries[p] = ([], {'skip': reason})
+					elif entry is None:
+						paths.append((p, st.st_size))
+					else:
+						entries[p] = entry
+				jobs.append((chunk, entries, paths, pool.submit(scanner.scan_chunk, paths) if paths else None))
+			for chunk, entries, paths, future in jobs:
+				if self.cancelled.is_set():
+					# leaving the pool waits for the chunks that were not cancelled in time
+					for job in jobs:
+						if job[3] is not None:
+							job[3].cancel()
+					return
+				try:
+					scanned = future.result() if future else []
+				except(concurrent.futures.process.BrokenProcessPool, OSError) as e:
+					print(f'TodoReview: scan worker failed ({e}), scanning the chunk in process')
+					scanned = [self.matcher.scan_file(p, self.decoder, size) for p, size in paths]
+				fresh = dict(zip((p for p, size in paths), scanned))
+				for p, st in chunk:
+					if p in self.buffers:
+						yield from self.extract_file(p, st)
+						continue
+					self.progress(st.st_size)
+					if p in fresh:
+						entry = fresh[p]
+						if self.cache is not None:
+							self.cache.put(p, st, *entry)
+					else:
+						entry = entries[p]
+					yield from self.to_records(p, self.checked(entry))
+
+	def process_context(self):
+		if os.path.basename(sys.executable or '').lower().startswith('python'):
+			return multiprocessing.get_context()
+		# inside Sublime Text sys.executable is the editor, which can't start workers, and
+		# forking the threaded plugin host without an exec is unsafe on every platform
+		print('TodoReview: scan_mode "processes" needs a Python interpreter to start workers, using threads')
+		return None
+
+	def extract_file(self, p, st):
+		try:
+			if p in self.buffers:
+				return self.to_records(p, self.matcher.scan_text(self.buffers[p]))
+			return self.to_records(p, self.scan_file(p, st))
+		finally:
+			self.progress(st.st_size)
+
+	def scan_file(self, p, st):
+		reason = self.precheck(p, st)
+		if reason is not None:
+			return self.checked(([], {'skip': reason}))
+		entry = self.cache.get(p, st) if self.cache is not None else None
+		if entry is None:
+			entry = self.matcher.scan_file(p, self.decoder, st.st_size)
+			if self.cache is not None:
+				self.cache.put(p, st, *entry)
+		return self.checked(entry)
+
+	def precheck(self, p, st):
+		ext = os.path.splitext(p)[1].lower()
+		if ext in self.exclude_extensions or (self.include_extensions and ext not in self.include_extensions):
+			return 'extension'
+		if self.max_file_size and st.st_size > self.max_file_size:
+			return 'size'
+		return None
+
+	def checked(self, entry):
+		hits, info = entry
+		if info and info.get('skip'):
+			with self.lock:
+				self.stats['skipped'][info['skip']] += 1
+			return []
+		return hits
+
+	def extensions(self, names):
+		return {('.' + name.lstrip('.')).lower() for name in names or []}
+
+	def to_records(self, p, hits):
+		if not hits:
+			return []
+		file = self.table.intern(p)
+		return [Result(file, patt, note, num, priority) for patt, note, num, priority in hits]
+
+	def process(self):
+		if self.cache_folder:
+			# the open files change with every tab, the folders don't: keying on them too would
+			# write another copy of the whole project's cache for each set of tabs
+			self.cache = ScanCache(
+				cache_file(self.cache_folder, self.dirpaths),
+				signature(self.patterns, self.case_sensitive, self.encoding, self.encoding_fallbacks, self.encoding_overrides))
+		yield from self.extract(self.ahead(self.files()))
+		# a cancelled scan hasn't seen every file, saving would drop the rest from the cache
+		if self.cache is not None and not self.cancelled.is_set():
+			self.stats['cache_hits'] = self.cache.hits
+			self.stats['cache_misses'] = self.cache.misses
+			try:
+				self.cache.save()
+			except OSError as e:
+				print(f'TodoReview: could not write the scan cache ({e})')
+			prune(self.cache_folder, self.cache.path)
+
+	def resolve(self, directory):
+		if self.settings.get('resolve_symlinks', True):
+			return os.path.realpath(os.path.expanduser(os.path.abspath(directory)))
+		else:
+			return os.path.expanduser(os.path.abspath(directory))
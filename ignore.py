@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: .gitignore style ignore files, compiled once per folder and inherited down the tree
+  Created: 2026-10-17 11:37:22
+"""
+
+import os
+import re
+
+# follow the file system: case insensitive where paths are
+FLAGS = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+
+
+def translate(glob: str) -> str:
+	"""Translate a gitignore glob into a regular expression matching '/' separated relative paths"""
+	out = []
+	i, n = 0, len(glob)
+	while i < n:
+		c = glob[i]
+		if c == '*':
+			if glob[i:i + 2] == '**' and (i == 0 or glob[i - 1] == '/'):
+				if glob[i + 2:i + 3] == '/':
+					# leading or inner '**/' matches zero or more folders
+					out.append('(?:.*/)?')
+					i += 3
+					continue
+				if i + 2 == n:
+					# trailing '/**' matches everything inside
+					out.append('.*')
+					i += 2
+					continue
+			while glob[i:i + 1] == '*':
+				i += 1
+			out.append('[^/]*')
+			continue
+		if c == '?':
+			out.append('[^/]')
+		elif c == '[':
+			j = i + 1
+			if glob[j:j + 1] in ('!', '^'):
+				j += 1
+			# like fnmatch, a ']' first in the set is part of it rather than its end
+			if glob[j:j + 1] == ']':
+				j += 1
+			j = glob.find(']', j)
+			if j == -1:
+				out.append(re.escape(c))
+			else:
+				body = glob[i + 1:j]
+				if body[0] in ('!', '^'):
+					body = '^' + body[1:]
+				out.append('[' + body.replace('\\', '\\\\') + ']')
+				i = j
+		elif c == '\\' and i + 1 < n:
+			i += 1
+			out.append(re.escape(glob[i]))
+		else:
+			out.append(re.escape(c))
+		i += 1
+	return ''.join(out)
+
+
+def parse(lines) -> list:
+	"""Parse ignore file lines into (regex, negate, dir_only) rules, in file order"""
+	rules = []
+	for line in lines:
+		line = line.rstrip('\n').rstrip('\r')
+		if not line or line.startswith('#'):
+			continue
+		# trailing spaces are dropped unless escaped
+		stripped = line.rstrip(' ')
+		if stripped.endswith('\\') and len(stripped) < len(line):
+			stripped += ' '
+		line = stripped
+		negate = line.startswith('!')
+		if negate or line.startswith('\\!') or line.startswith('\\#'):
+			line = line[1:]
+		dir_only = line.endswith('/')
+		line = line.rstrip('/')
+		if not line:
+			continue
+		if '/' in line:
+			# a separator anywhere but at the end anchors the pattern to the ignore file's folder
+			regex = translate(line.lstrip('/'))
+		else:
+			regex = '(?:.*/)?' + translate(line)
+		try:
+			re.compile(regex, FLAGS)
+		except re.error:
+			# a line git can't make sense of either, such as a reversed range, matches nothing
+			continue
+		rules.append((regex, negate, dir_only))
+	return rules
+
+
+class IgnoreRules():
+	"""The rules of one folder's ignore files, chained to the rules of the folders above it"""
+
+	def __init__(self, folder: str, rules: list, parent=None):
+		self.folder = folder
+		self.parent = parent
+		self.prefix = len(folder.rstrip(os.sep)) + 1
+		# last match wins, so alternatives are tried in reverse file order
+		self.negate = [negate for regex, negate, dir_only in reversed(rules)]
+		self.any = self.compile([regex for regex, negate, dir_only in reversed(rules)])
+		self.files = self.compile([regex if not dir_only else '(?!)' for regex, negate, dir_only in reversed(rules)])
+
+	def compile(self, regexes: list):
+		return re.compile('|'.join('(%s)' % r for r in regexes), FLAGS)
+
+	@classmethod
+	def load(cls, folder: str, names: list, parent=None, listing=None):
+		"""Rules for folder, or the parent's rules when the folder has no ignore files"""
+		rules = []
+		for name in names:
+			if listing is not None and name not in listing:
+				continue
+			try:
+				with open(os.path.join(folder, name), 'r', encoding='utf-8', errors='replace') as f:
+					rules.extend(parse(f))
+			except OSError:
+				continue
+		if not rules:
+			return parent
+		return cls(folder, rules, parent)
+
+	@classmethod
+	def for_root(cls, root: str, names: list):
+		"""Rules for root, including ignore files of the folders above it up to the repository root"""
+		folders = [root]
+		folder = root
+		while not os.path.exists(os.path.join(folder, '.git')):
+			parent = os.path.dirname(folder)
+			if parent == folder:
+				# not inside a repository, only root's own ignore files count
+				folders = [root]
+				break
+			folder = parent
+			folders.append(folder)
+		rules = None
+		for folder in reversed(folders):
+			rules = cls.load(folder, names, rules)
+		return rules
+
+	def ignored(self, path: str, is_dir: bool) -> bool:
+		level = self
+		while level is not None:
+			rel = path[level.prefix:]
+			if os.sep != '/':
+				rel = rel.replace(os.sep, '/')
+			m = (level.any if is_dir else level.files).fullmatch(rel)
+			if m is not None:
+				return not level.negate[m.lastindex - 1]
+			level = level.parent
+		return False
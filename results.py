@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: compact result records, with the file paths they are in stored once
+  Created: 2026-10-17 22:31:47
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+FIELDS = ('file', 'patt', 'note', 'line', 'priority')
+
+
+class FileTable():
+	"""Every file path of a review once, results refer to them by position"""
+
+	def __init__(self, paths=()):
+		self.paths = list(paths)
+		self.ids = {p: i for i, p in enumerate(self.paths)}
+		self.lock = threading.Lock()
+
+	def intern(self, p: str) -> int:
+		i = self.ids.get(p)
+		if i is not None:
+			return i
+		# scan threads intern files concurrently
+		with self.lock:
+			i = self.ids.get(p)
+			if i is None:
+				i = self.ids[p] = len(self.paths)
+				self.paths.append(p)
+			return i
+
+	def __getitem__(self, i: int) -> str:
+		return self.paths[i]
+
+	def __contains__(self, p: str) -> bool:
+		return p in self.ids
+
+	def __len__(self):
+		return len(self.paths)
+
+
+class Result():
+	"""One matching comment; file is its path's position in a FileTable"""
+	__slots__ = FIELDS
+
+	def __init__(self, file: int, patt: str, note: str, line: int, priority: int):
+		self.file = file
+		self.patt = patt
+		self.note = note
+		self.line = line
+		self.priority = priority
+
+	def row(self) -> list:
+		return [self.file, self.patt, self.note, self.line, self.priority]
+
+	def to_dict(self, files: FileTable) -> dict:
+		return {'file': files[self.file], 'patt': self.patt, 'note': self.note, 'line': self.line, 'priority': self.priority}
+
+	def __eq__(self, other):
+		return isinstance(other, Result) and self.row() == other.row()
+
+	def __repr__(self):
+		return 'Result({0})'.format(', '.join(repr(value) for value in self.row()))
+
+
+class Review():
+	"""What a results view shows: its sections as [patt, items in order, how many are drawn],
+	and the width its rows are aligned to. rows[i] is the result of its i-th 'results' region,
+	or None for the line standing in for the items a section leaves out"""
+
+	def __init__(self, files: FileTable = None, sections: list = None, largest: int = 0):
+		self.files = files if files is not None else FileTable()
+		self.sections = sections or []
+		self.largest = largest
+		self.rows = []
+		for patt, items, shown in self.sections:
+			self.rows.extend(items[:shown])
+			if shown < len(items):
+				self.rows.append(None)
+
+	def save(self, path: str):
+		data = pack([item for patt, items, shown in self.sections for item in items], self.files)
+		data['sections'] = [[patt, len(items), shown] for patt, items, shown in self.sections]
+		data['largest'] = self.largest
+		folder = os.path.dirname(path)
+		os.makedirs(folder, exist_ok=True)
+		fd, temp = tempfile.mkstemp(prefix='.review-', suffix='.tmp', dir=folder)
+		try:
+			with os.fdopen(fd, 'w', encoding='utf-8') as f:
+				json.dump(data, f, separators=(',', ':'))
+			os.replace(temp, path)
+		except BaseException:
+			try:
+				os.remove(temp)
+			except OSError:
+				pass
+			raise
+
+	@classmethod
+	def load(cls, path: str):
+		with open(path, 'r', encoding='utf-8') as f:
+			data = json.load(f)
+		files, items = unpack(data)
+		sections = []
+		pos = 0
+		for patt, count, shown in data.get('sections', []):
+			sections.append([patt, items[pos:pos + count], shown])
+			pos += count
+		return cls(files, sections, data.get('largest', 0))
+
+
+def rebase(items: list, source: FileTable, target: FileTable) -> list:
+	"""items of source's files, referring to the same paths in target"""
+	return [Result(target.intern(source[item.file]), item.patt, item.note, item.line, item.priority) for item in items]
+
+
+def pack(items: list, files: FileTable) -> dict:
+	"""items as plain lists for JSON, with a file table of only the files they are in"""
+	table = FileTable()
+	rows = [[table.intern(files[item.file]), item.patt, item.note, item.line, item.priority] for item in items]
+	return {'files': table.paths, 'rows': rows}
+
+
+def unpack(data: dict) -> tuple:
+	"""The (FileTable, items) pack was given"""
+	return FileTable(data.get('files', [])), [Result(*row) for row in data.get('rows', [])]
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: pattern matching that doesn't depend on sublime, shared by the plugin and the scan worker processes
+  Created: 2026-10-17 10:04:18
+"""
+
+import bisect
+import codecs
+import fnmatch
+import functools
+import io
+import mmap
+import re
+
+try:
+	import re._parser as sre_parse
+except ImportError:
+	import sre_parse
+
+PRIORITY_PATTERN = re.compile(r'\(([0-9]{1,5})\)')
+DEFAULT_PRIORITY = 5000
+# \A, \Z and lookarounds see past the end of the line when the whole file is matched at once
+LINE_BOUND_PATTERN = re.compile(r'\\[AZ]|\(\?<?[=!]')
+NEWLINE_PATTERN = re.compile('\n')
+# newlines are counted in slices of this size so a mapped file is never copied whole
+COUNT_CHUNK = 1 << 20
+ASCII_SAMPLE = ''.join(map(chr, range(128)))
+# how much of a file is looked at to tell text from binary
+SNIFF_SIZE = 8192
+TEXT_BYTES = bytes(sorted({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f}))
+BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+# the UTF-32 LE mark starts with the UTF-16 LE one, so it is looked for first
+BOM_ENCODINGS = (
+	(codecs.BOM_UTF8, 'utf-8-sig'),
+	(codecs.BOM_UTF32_LE, 'utf-32'),
+	(codecs.BOM_UTF32_BE, 'utf-32'),
+	(codecs.BOM_UTF16_LE, 'utf-16'),
+	(codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+@functools.lru_cache(maxsize=None)
+def ascii_compatible(encoding: str) -> bool:
+	"""Whether the encoding keeps ASCII (and with it newlines) as single bytes"""
+	try:
+		return ASCII_SAMPLE.encode(encoding) == ASCII_SAMPLE.encode('ascii')
+	except(LookupError, UnicodeError):
+		return False
+
+
+def is_binary(head: bytes, encoding: str) -> bool:
+	"""Tell binary files from text by the NUL bytes and control characters in their first bytes"""
+	if not head or head.startswith(BOMS) or not ascii_compatible(encoding):
+		return False
+	if b'\0' in head:
+		return True
+	return len(head.translate(None, TEXT_BYTES)) > len(head) * 0.3
+
+
+def normalize_newlines(text: str) -> str:
+	"""What reading the file in text mode would have done to its line endings"""
+	if '\r' in text:
+		text = text.replace('\r\n', '\n').replace('\r', '\n')
+	return text
+
+
+def decided(encoding: str, errors: str) -> dict:
+	"""The scan info recording how a file was decoded"""
+	if errors == 'strict':
+		return {'encoding': encoding}
+	return {'encoding': encoding, 'errors': errors}
+
+
+class Decoder():
+	"""Works out how to decode a file: by its BOM, then a per-glob override, the configured
+	encoding and the fallbacks, in that order, and finally the override or configured
+	encoding with undecodable bytes replaced. The decision only depends on the file's
+	content, so a cached scan and a fresh one always agree"""
+
+	def __init__(self, encoding: str = 'utf-8', fallbacks: list = None, overrides: dict = None):
+		self.encoding = encoding or 'utf-8'
+		self.fallbacks = list(fallbacks or [])
+		self.overrides = [(re.compile(fnmatch.translate(glob)), name) for glob, name in (overrides or {}).items()]
+
+	def override(self, path: str):
+		for glob, name in self.overrides:
+			if glob.search(path) is not None:
+				return name
+		return None
+
+	def candidates(self, path: str, head: bytes) -> list:
+		"""(encoding, errors) pairs to try in order, the last one can't fail on bad bytes"""
+		for bom, name in BOM_ENCODINGS:
+			if head.startswith(bom):
+				return [(name, 'strict'), (name, 'replace')]
+		found = []
+		override = self.override(path)
+		for name in [override, self.encoding] + self.fallbacks:
+			if name and (name, 'strict') not in found:
+				found.append((name, 'strict'))
+		if (override or self.encoding, 'replace') not in found:
+			found.append((override or self.encoding, 'replace'))
+		return found
+
+	def decode(self, data: bytes, candidates: list):
+		"""The decoded text and the scan info recording the decision, or (None, None)"""
+		for name, errors in candidates:
+			try:
+				return data.decode(name, errors), decided(name, errors)
+			except(UnicodeDecodeError, LookupError):
+				continue
+		return None, None
+
+
+def required_literals(items) -> list:
+	"""Literal strings one of which is part of every match of the parsed pattern items, or None"""
+	best = None
+
+	def consider(candidate):
+		nonlocal best
+		if candidate and all(candidate) and (best is None or min(map(len, candidate)) > min(map(len, best))):
+			best = candidate
+
+	run = []
+	for op, av in items:
+		if op == sre_parse.LITERAL:
+			run.append(chr(av))
+			continue
+		consider([''.join(run)])
+		run = []
+		if op == sre_parse.SUBPATTERN and not av[1] and not av[2]:
+			consider(required_literals(av[-1]))
+		elif op == sre_parse.BRANCH:
+			alternatives = [required_literals(a) for a in av[1]]
+			if all(alternatives):
+				consider([literal for a in alternatives for literal in a])
+		elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+			consider(required_literals(av[2]))
+	consider([''.join(run)])
+	return best
+
+
+def pattern_literals(patterns: list, flags: int):
+	"""The literals that have to be present for any of the patterns to match, and whether
+	they have to be looked for case insensitively; None when a pattern has no literal"""
+	literals = []
+	fold = bool(flags & re.IGNORECASE)
+	for pattern in patterns:
+		try:
+			parsed = sre_parse.parse(pattern, flags)
+		except(re.error, TypeError, ValueError):
+			return None, fold
+		found = required_literals(list(parsed))
+		if not found:
+			return None, fold
+		fold = fold or bool(parsed.state.flags & re.IGNORECASE)
+		literals.extend(found)
+	return sorted(set(literals)), fold
+
+
+class Matcher():
+	"""Compiled todo patterns; hits are (patt, note, line, priority) tuples"""
+
+	def __init__(self, patterns: dict, case_sensitive: bool = False, match_mode: str = 'buffer', mmap_min_size: int = 0):
+		source = '|'.join(patterns.values())
+		flags = 0 if case_sensitive else re.IGNORECASE
+		self.source = source
+		self.flags = flags
+		self.patterns = re.compile(source, flags)
+		self.mmap_min_size = mmap_min_size or 0
+		self.bytes_patterns = {}
+		self.priority = PRIORITY_PATTERN
+		self.buffer = None
+		if match_mode != 'lines' and not LINE_BOUND_PATTERN.search(source):
+			self.buffer = re.compile(source, flags | re.MULTILINE)
+		# a cheap substring test rules out files and lines that can't match
+		self.literals, self.fold = pattern_literals(list(patterns.values()), flags)
+		if self.literals is not None and self.fold:
+			self.folded = [literal.lower() for literal in self.literals]
+			self.ascii = all(literal.isascii() for literal in self.literals)
+			# outside ASCII str.lower() and re.IGNORECASE don't always agree, let re decide there
+			self.literal_pattern = re.compile('|'.join(map(re.escape, self.literals)), re.IGNORECASE)
+
+	def candidate(self, text: str) -> bool:
+		if self.literals is None:
+			return True
+		if not self.fold:
+			return any(literal in text for literal in self.literals)
+		if self.ascii and text.isascii():
+			text = text.lower()
+			return any(literal in text for literal in self.folded)
+		return self.literal_pattern.search(text) is not None
+
+	def hits(self, result, num, results):
+		for patt, note in result.groupdict().items():
+			if not note and note != '':
+				continue
+			priority_match = self.priority.search(note)
+			if(priority_match):
+				priority = int(priority_match.group(1))
+			else:
+				priority = DEFAULT_PRIORITY
+			results.append((patt, note, num, priority))
+
+	def scan_lines(self, lines, results: list = None) -> list:
+		if results is None:
+			results = []
+		# case sensitive patterns with a literal prefix are found about as fast by re itself
+		prefilter = self.literals is not None and self.fold
+		for num, line in enumerate(lines, 1):
+			if prefilter and not self.candidate(line):
+				continue
+			for result in self.patterns.finditer(line):
+				self.hits(result, num, results)
+		return results
+
+	def scan_text(self, text: str, results: list = None) -> list:
+		"""Match the whole text at once, working out line numbers for the hits only"""
+		if results is None:
+			results = []
+		if not self.candidate(text):
+			return results
+		if self.buffer is None:
+			return self.scan_lines(io.StringIO(text), results)
+		found = []
+		newlines = None
+		for result in self.buffer.finditer(text):
+			start, end = result.span()
+			if text.find('\n', start, end) != -1:
+				# the match ran into the next line, only line by line matching gets it right
+				return self.scan_lines(io.StringIO(text), results)
+			if newlines is None:
+				newlines = [m.start() for m in NEWLINE_PATTERN.finditer(text)]
+			self.hits(result, bisect.bisect_left(newlines, start) + 1, found)
+		results.extend(found)
+		return results
+
+	def bytes_pattern(self, encoding: str):
+		"""The patterns compiled for raw file contents in encoding, or None where that can't work"""
+		if encoding not in self.bytes_patterns:
+			pattern = None
+			try:
+				source = self.source.encode(encoding)
+				# bytes patterns only fold ASCII letters
+				if ascii_compatible(encoding) and (self.source.isascii() or not self.flags & re.IGNORECASE):
+					pattern = re.compile(source, self.flags | re.MULTILINE)
+			except(LookupError, UnicodeError, re.error):
+				pass
+			self.bytes_patterns[encoding] = pattern
+		return self.bytes_patterns[encoding]
+
+	def scan_mapped(self, f, encoding: str):
+		"""Match a memory mapped file as bytes, decoding only the notes that matched.
+		None means the file has to be matched as text"""
+		pattern = self.bytes_pattern(encoding)
+		if pattern is None or self.buffer is None:
+			return None
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+			return self.scan_buffer(pattern, buf, encoding)
+
+	def scan_buffer(self, pattern, buf, encoding: str):
+		if self.literals is not None and not self.fold:
+			try:
+				if all(buf.find(literal.encode(encoding)) == -1 for literal in self.literals):
+					return []
+			except UnicodeError:
+				pass
+		found = []
+		num, pos = 1, 0
+		decode = codecs.getdecoder(encoding)
+		try:
+			for result in pattern.finditer(buf):
+				start, end = result.span()
+				if buf.find(b'\n', start, end) != -1:
+					return None
+				while pos < start:
+					num += buf[pos:min(start, pos + COUNT_CHUNK)].count(b'\n')
+					pos = min(start, pos + COUNT_CHUNK)
+				for patt, note in result.groupdict().items():
+					if note is None:
+						continue
+					note = decode(note)[0]
+					if note.endswith('\r'):
+						note = note[:-1]
+					priority_match = self.priority.search(note)
+					found.append((patt, note, num, int(priority_match.group(1)) if priority_match else DEFAULT_PRIORITY))
+		except UnicodeDecodeError:
+			return None
+		finally:
+			# match objects pin the map, it can't be closed while one is alive
+			result = None
+		return found
+
+	def scan_file(self, path: str, decoder: Decoder, size: int = 0):
+		"""Scan a file on disk, returning its hits and a dict with what else there is to know
+		about it (the encoding it was decoded with or why it was skipped), or None"""
+		try:
+			with open(path, 'rb') as f:
+				head = f.read(SNIFF_SIZE)
+				candidates = decoder.candidates(path, head)
+				if is_binary(head, candidates[0][0]):
+					return [], {'skip': 'binary'}
+				if self.mmap_min_size and size >= self.mmap_min_size:
+					encoding, errors = candidates[0]
+					found = None
+					if errors == 'strict':
+						try:
+							found = self.scan_mapped(f, encoding)
+						except(OSError, ValueError):
+							found = None
+					if found is not None:
+						return found, decided(encoding, errors)
+					return self.scan_stream(path, candidates)
+				data = head + f.read()
+		except OSError:
+			return [], None
+		text, info = decoder.decode(data, candidates)
+		if text is None:
+			return [], None
+		return self.scan_text(normalize_newlines(text)), info
+
+	def scan_stream(self, path: str, candidates: list):
+		"""Match a file line by line, without holding more than a line in memory; a file
+		that turns out not to be in an encoding is read again in the next one"""
+		for encoding, errors in candidates:
+			results = []
+			try:
+				with io.open(path, 'r', encoding=encoding, errors=errors) as f:
+					self.scan_lines(f, results)
+				return results, decided(encoding, errors)
+			except(UnicodeDecodeError, LookupError):
+				continue
+			except IOError:
+				break
+		return [], None
+
+
+_worker = None
+
+
+def init_worker(patterns: dict, case_sensitive: bool, match_mode: str, mmap_min_size: int, decoder: Decoder):
+	"""Process pool initializer: compile the pattern set once per worker process"""
+	global _worker
+	_worker = (Matcher(patterns, case_sensitive, match_mode, mmap_min_size), decoder)
+
+
+def scan_chunk(files: list) -> list:
+	"""Scan a chunk of (path, size) files in a worker process, returning (hits, info) per path"""
+	matcher, decoder = _worker
+	return [matcher.scan_file(p, decoder, size) for p, size in files]
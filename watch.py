@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+#coding:utf-8
+"""
+  Author:  gemisigo --<gemisigo@gmail.com>
+  Purpose: in-memory index of a review's results, kept current by a background watcher
+  Created: 2026-10-17 21:24:05
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+EVENT = struct.Struct('iIII')
+
+# how much CPU time is spent before the budget makes the watcher sleep it off
+BUDGET_SLICE = 0.02
+# with inotify, a full polling pass still runs this many intervals apart, for what it can't see
+INOTIFY_POLL_FACTOR = 12
+
+
+class Budget():
+	"""Keeps a thread at or below a share of one core: CPU time spent is paid back by sleeping"""
+
+	def __init__(self, share: float):
+		self.share = min(max(share or 0.05, 0.01), 1.0)
+		self.mark = time.thread_time()
+
+	def spend(self, stopped: threading.Event = None):
+		used = time.thread_time() - self.mark
+		if used < BUDGET_SLICE:
+			return
+		pause = used * (1 - self.share) / self.share
+		if stopped is not None:
+			stopped.wait(pause)
+		else:
+			time.sleep(pause)
+		self.mark = time.thread_time()
+
+
+class Inotify():
+	"""Folder change events from the Linux kernel, through libc; None where there is no inotify"""
+
+	def __init__(self, libc, fd: int):
+		self.libc = libc
+		self.fd = fd
+		self.folders = {}
+		self.watched = set()
+		# whether every folder asked for is watched; if not, changes can slip by unseen
+		self.complete = True
+
+	@classmethod
+	def create(cls):
+		if not sys.platform.startswith('linux'):
+			return None
+		try:
+			libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+			fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+		except(OSError, AttributeError):
+			return None
+		if fd < 0:
+			return None
+		return cls(libc, fd)
+
+	def watch(self, folder: str):
+		if folder in self.watched:
+			return
+		self.watched.add(folder)
+		wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+		if wd < 0:
+			# most likely fs.inotify.max_user_watches ran out
+			self.complete = False
+			return
+		self.folders[wd] = folder
+
+	def read(self, timeout: float) -> list:
+		"""(path, mask) of the events within timeout seconds; a None path means events were lost"""
+		try:
+			ready, _, _ = select.select([self.fd], [], [], timeout)
+			if not ready:
+				return []
+			data = os.read(self.fd, 65536)
+		except InterruptedError:
+			return []
+		except OSError as e:
+			if e.errno == errno.EAGAIN:
+				return []
+			raise
+		events = []
+		pos = 0
+		while pos + EVENT.size <= len(data):
+			wd, mask, cookie, size = EVENT.unpack_from(data, pos)
+			name = data[pos + EVENT.size:pos + EVENT.size + size].rstrip(b'\0')
+			pos += EVENT.size + size
+			if mask & IN_Q_OVERFLOW:
+				events.append((None, mask))
+				continue
+			if mask & IN_IGNORED:
+				self.watched.discard(self.folders.pop(wd, None))
+				continue
+			folder = self.folders.get(wd)
+			if folder is not None:
+				events.append((os.path.join(folder, os.fsdecode(name)) if name else folder, mask))
+		return events
+
+	def close(self):
+		try:
+			os.close(self.fd)
+		except OSError:
+			pass
+
+
+class Index():
+	"""The results of every file an engine scans, per path in walk order. A background
+	thread builds it, then keeps it current with inotify events where there are any and
+	by polling file modification times, within a CPU budget"""
+
+	def __init__(self, key: str, engine, interval: float = 5.0, budget: float = 0.1):
+		self.key = key
+		self.engine = engine
+		self.interval = max(interval or 5.0, 0.5)
+		self.budget = budget
+		self.entries = {}
+		self.stats = {}
+		self.ready = threading.Event()
+		self.lock = threading.Lock()
+		self.thread = threading.Thread(target=self.run, name='TodoReview index', daemon=True)
+
+	@property
+	def stopped(self):
+		return self.engine.cancelled
+
+	def start(self):
+		self.thread.start()
+		return self
+
+	def stop(self):
+		self.stopped.set()
+
+	def results(self, overrides: dict = None):
+		"""All results, the number of files they come from and the last pass' stats;
+		overrides replaces the results of some files, keeping their place"""
+		overrides = overrides or {}
+		with self.lock:
+			entries = list(self.entries.items())
+			stats = dict(self.stats)
+		stats['bytes'] = sum(entry[1] for p, entry in entries)
+		return [item for p, entry in entries for item in overrides.get(p, entry[2])], len(entries), stats
+
+	def run(self):
+		budget = Budget(self.budget)
+		notifier = Inotify.create()
+		try:
+			self.refresh(budget, notifier)
+			self.ready.set()
+			last = time.monotonic()
+			while not self.stopped.is_set():
+				if notifier is None or not notifier.complete:
+					self.stopped.wait(self.interval)
+					self.refresh(budget, notifier)
+					continue
+				events = notifier.read(self.interval)
+				if time.monotonic() - last >= self.interval * INOTIFY_POLL_FACTOR or not self.changed(events, budget):
+					self.refresh(budget, notifier)
+					last = time.monotonic()
+		except Exception as e:
+			print(f'TodoReview: the index watcher stopped ({e})')
+		finally:
+			# nothing keeps the entries current anymore, searches scan instead
+			self.ready.clear()
+			if notifier is not None:
+				notifier.close()
+
+	def refresh(self, budget: Budget, notifier=None):
+		"""One polling pass: walk the files, scanning only the ones whose mtime or size changed"""
+		self.engine.reset_stats()
+		entries = {}
+		for p, st in self.engine.files():
+			if self.stopped.is_set():
+				return
+			entry = self.entries.get(p)
+			if entry is None or entry[0] != st.st_mtime_ns or entry[1] != st.st_size:
+				entry = (st.st_mtime_ns, st.st_size, self.engine.to_records(p, self.engine.scan_file(p, st)))
+			entries[p] = entry
+			if notifier is not None:
+				notifier.watch(os.path.dirname(p))
+			budget.spend(self.stopped)
+		with self.lock:
+			self.entries = entries
+			self.stats = dict(self.engine.stats)
+
+	def changed(self, events: list, budget: Budget) -> bool:
+		"""Apply events to indexed files in place; False when they need a polling pass instead"""
+		for path, mask in events:
+			if path is not None and path not in self.entries and self.unlisted(path, mask):
+				continue
+			if path is None or mask & IN_ISDIR or path not in self.entries:
+				# lost events, folders and new files: only a walk knows where they go in the index
+				return False
+			if mask & (IN_DELETE | IN_MOVED_FROM):
+				with self.lock:
+					del self.entries[path]
+				continue
+			try:
+				st = os.stat(path)
+			except OSError:
+				return False
+			entry = self.entries[path]
+			if entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+				continue
+			entry = (st.st_mtime_ns, st.st_size, self.engine.to_records(path, self.engine.scan_file(path, st)))
+			with self.lock:
+				self.entries[path] = entry
+			budget.spend(self.stopped)
+		return True
+
+	def unlisted(self, path: str, mask: int) -> bool:
+		"""Whether an event about a path the index doesn't have can be passed over, rather
+		than walking every folder again"""
+		if mask & IN_ISDIR:
+			return self.engine.admits(path, True) is False
+		if mask & IN_DELETE_SELF:
+			return False
+		if mask & (IN_DELETE | IN_MOVED_FROM) or not os.path.isfile(path):
+			# never listed, or already gone again like the temporary file of an atomic save
+			return True
+		return self.engine.admits(path) is False